@@ -0,0 +1,118 @@
+"""Cold-start benchmark: how long importing the entry points takes, and which heavy modules they load.
+
+Every measurement runs in a fresh interpreter with -X importtime, so nothing is cached in sys.modules.
+--repository measures another checkout, e.g. a git worktree of an older commit, for a before/after comparison:
+
+    python -m benchmarks.import_time --output imports.json
+    python -m benchmarks.import_time --repository ../baseline --output before.json
+    python -m benchmarks.import_time --baseline before.json --output after.json
+
+With --baseline, modules whose import got slower by more than --max-regression are reported and the exit
+code is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points a CLI run or a library user imports.
+DEFAULT_MODULES = ("main", "scenarios.base_scenarios", "scenarios.scenario_runner", "utils.tools")
+
+# Dependencies that should only load when the feature needing them is used.
+HEAVY_MODULES = ("docx", "lxml", "asyncio", "multiprocessing", "ctypes", "send2trash", "urllib.request")
+
+PROBE = "import sys, json, {module}; print(json.dumps([name for name in {heavy!r} if name in sys.modules]))"
+
+
+def measure_import(module, repository):
+    """Imports the module in a fresh interpreter and returns its cumulative import time and the heavy modules loaded."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (repository, os.environ.get("PYTHONPATH")))))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                               cwd=repository, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+    microseconds = None
+    for line in completed.stderr.splitlines():
+        # Lines look like "import time:   self |   cumulative | name", with the name indented by depth.
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module and not parts[2][1:].startswith(" "):
+            microseconds = int(parts[1])
+    return microseconds / 1e6, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(modules, repository, repeat):
+    results = []
+    for module in modules:
+        samples = []
+        for _ in range(repeat):
+            seconds, heavy = measure_import(module, repository)
+            samples.append(seconds)
+        results.append({"module": module, "median_seconds": statistics.median(samples), "min_seconds": min(samples),
+                        "heavy_modules": heavy})
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """Returns (module, baseline seconds, current seconds) for every import slower than the baseline allows."""
+    previous = {item["module"]: item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        old = previous.get(item["module"])
+        if old and item["median_seconds"] > old["median_seconds"] * (1 + max_regression):
+            regressions.append((item["module"], old["median_seconds"], item["median_seconds"]))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the cold-start import time of the package.")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="Comma separated modules to import.")
+    parser.add_argument("--repository", default=REPOSITORY_ROOT, help="Checkout to import the modules from.")
+    parser.add_argument("--repeat", type=int, default=7, help="Fresh interpreters per module; the median is reported.")
+    parser.add_argument("--output", default="import_time_results.json", help="JSON file the results are written to.")
+    parser.add_argument("--baseline", default=None, help="Earlier results to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed increase of the median import time against the baseline, as a fraction.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run([module for module in args.modules.split(",") if module], os.path.abspath(args.repository), args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    previous = {item["module"]: item for item in baseline["results"]} if baseline else {}
+    for item in results:
+        change = ""
+        if item["module"] in previous:
+            change = f" (baseline {previous[item['module']]['median_seconds'] * 1000:.1f} ms)"
+        print(f"{item['module']}: {item['median_seconds'] * 1000:.1f} ms{change}, "
+              f"heavy modules: {', '.join(item['heavy_modules']) or 'none'}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repository": os.path.abspath(args.repository),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=4)
+
+    if baseline:
+        regressions = compare(results, baseline, args.max_regression)
+        for module, old, new in regressions:
+            print(f"REGRESSION {module}: {old * 1000:.1f} -> {new * 1000:.1f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
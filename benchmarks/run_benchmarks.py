@@ -0,0 +1,372 @@
+"""Benchmarks of the scenarios, the Tools file writers and the writer backends.
+
+Every case runs in a fresh subprocess inside a scratch folder on each target filesystem (tmpfs and disk by
+default), so peak RSS is measured per case and no case warms the page cache or folder cache of another.
+
+    python -m benchmarks.run_benchmarks --secrets "config\\secrets.json" --output results.json
+    python -m benchmarks.run_benchmarks --secrets "config\\secrets.json" --baseline results.json --output new.json
+
+With --baseline, cases whose files/sec dropped by more than --max-regression are reported and the exit
+code is 1. A case that fails is recorded with its error in the results, the remaining cases still run, and
+the exit code is 1 as well.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Path the scenarios read the secrets from, relative to the working directory.
+SECRETS_PATH = r"config\secrets.json"
+
+# Tools methods benchmarked file by file.
+TOOLS_METHODS = ("create_file_with_text", "create_json_file_windows", "create_csv_file_windows", "create_doc_file")
+
+# Writer backends benchmarked in scale mode, as (name, writer, options).
+WRITER_CONFIGS = (
+    ("direct", "direct", {}),
+    ("batched", "batched", {}),
+    ("batched_background", "batched", {"background": True}),
+    # In-memory filesystem: the generator's CPU cost without any disk I/O.
+    ("memory", "direct", {"filesystem": "memory"}),
+)
+
+# Encoding chains benchmarked in scale mode (see utils.secret_encodings).
+ENCODING_CHAINS = ("base64", "hex", "url_all", "gzip|base64", "embed|utf16le", "embed|gzip")
+
+# Directory trees benchmarked in scale mode, as (shape, depth, branching, file distribution) (see utils.topology).
+TOPOLOGY_CONFIGS = (
+    ("balanced", 3, 10, "uniform"),
+    ("balanced", 3, 10, "zipf"),
+    ("deep", 20, 5, "uniform"),
+    ("flat", 0, 1, "uniform"),
+)
+
+# Suffixes benchmarked one format at a time in scale mode: the text formats as the baseline, then the documents.
+FORMAT_SUFFIXES = (".txt", ".json", ".csv", ".docx", ".xlsx", ".pdf", ".pptx", ".eml")
+
+# Link modes benchmarked against writing every duplicate (None), and the extra files per distinct body (see utils.dedup).
+DEDUP_MODES = (None, "hardlink", "reflink", "copy")
+DEDUP_DUPLICATES = 9
+
+
+def default_targets():
+    """tmpfs when the machine has one, and the disk holding the temporary folder."""
+    targets = []
+    if os.path.isdir("/dev/shm"):
+        targets.append(("tmpfs", "/dev/shm"))
+    targets.append(("disk", tempfile.gettempdir()))
+    return targets
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None where it cannot be measured."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+def build_cases(file_counts, large_sizes, workers, tabular_sizes=(), encodings=ENCODING_CHAINS):
+    """Every case of the suite, as JSON-serializable dictionaries."""
+    cases = [{"kind": "tools", "method": method, "files": count} for method in TOOLS_METHODS for count in file_counts]
+    cases += [{"kind": "writer", "writer": name, "writer_name": writer_name, "writer_options": options, "files": count}
+              for name, writer_name, options in WRITER_CONFIGS for count in file_counts]
+    cases += [{"kind": "large_file", "size": size} for size in large_sizes]
+    # Streamed large files keep their original case keys; the in-place fill modes are extra cases.
+    cases += [{"kind": "large_file", "size": size, "fill": fill} for fill in ("sparse", "preallocate", "template")
+              for size in large_sizes]
+    cases += [{"kind": "tabular", "format": file_format, "size": size}
+              for file_format in ("csv", "json", "jsonl") for size in tabular_sizes]
+    cases += [{"kind": "encoding", "encoding": encoding, "files": count} for encoding in encodings for count in file_counts]
+    cases += [{"kind": "topology", "shape": shape, "depth": depth, "branching": branching, "distribution": distribution,
+               "files": count} for shape, depth, branching, distribution in TOPOLOGY_CONFIGS for count in file_counts]
+    cases += [{"kind": "format", "suffix": suffix, "files": count} for suffix in FORMAT_SUFFIXES for count in file_counts]
+    cases += [{"kind": "dedup", "dedup": mode, "duplicates": DEDUP_DUPLICATES, "files": count}
+              for mode in DEDUP_MODES for count in file_counts]
+    cases += [{"kind": "corpus", "workers": count} for count in workers]
+    return cases
+
+
+def case_key(case, target_name):
+    """Stable name of a case, used to compare results between runs."""
+    parameters = ",".join(f"{key}={value}" for key, value in sorted(case.items())
+                          if key not in ("kind", "writer_name", "writer_options"))
+    return f"{target_name}/{case['kind']}/{parameters}"
+
+
+def _run_tools_case(case, secrets):
+    from utils.tools import Tools
+    from utils.renderers import SecretRenderer
+
+    tools = Tools()
+    renderer = SecretRenderer()
+    latencies = []
+    written = 0
+    for index in range(case["files"]):
+        secret = secrets[index % len(secrets)]
+        folder_path = f"generated_files\\bench\\{index // 1000:04d}\\"
+        file_name = f"{index:08d}_{secret['name']}"
+        start = time.perf_counter()
+        if case["method"] == "create_file_with_text":
+            written += tools.create_file_with_text(folder_path=folder_path, file_name=file_name + ".txt",
+                                                   text=secret["example"], secret=secret)
+        elif case["method"] == "create_json_file_windows":
+            written += tools.create_json_file_windows(folder_path=folder_path, file_name=file_name + ".json",
+                                                      data=renderer.render(".json", secret), secret=secret)
+        elif case["method"] == "create_csv_file_windows":
+            written += tools.create_csv_file_windows(folder_path=folder_path, file_name=file_name + ".csv",
+                                                     data=renderer.render(".csv", secret), secret=secret)
+        else:
+            written += tools.create_doc_file(folder_path=folder_path, secret=secret, file_name=file_name + ".docx")
+        latencies.append(time.perf_counter() - start)
+    return case["files"], written, latencies
+
+
+def _run_scale_case(case, secrets):
+    from scenarios.base_scenarios import BaseScenarios
+    from utils.writers import create_writer
+
+    encodings = (case["encoding"],) if "encoding" in case else ()
+    suffixes = (case["suffix"],) if "suffix" in case else None
+    with create_writer(case.get("writer_name", "direct"), **case.get("writer_options", {})) as writer:
+        scenarios = BaseScenarios(writer=writer)
+        latencies = []
+        written = 0
+        for spec in scenarios.iter_scale_file_specs(target_files=case["files"], encodings=encodings,
+                                                    suffixes=suffixes):
+            start = time.perf_counter()
+            written += scenarios.write_file_spec(spec)
+            latencies.append(time.perf_counter() - start)
+    return case["files"], written, latencies
+
+
+def _run_topology_case(case, secrets):
+    from scenarios.base_scenarios import BaseScenarios
+    from utils.topology import TreeTopology
+
+    topology = TreeTopology(shape=case["shape"], depth=case["depth"], branching=case["branching"],
+                            distribution=case["distribution"])
+    start = time.perf_counter()
+    files, written = BaseScenarios().generate_scale_files(target_files=case["files"], topology=topology)
+    return files, written, [time.perf_counter() - start]
+
+
+def _run_dedup_case(case, secrets):
+    from scenarios.base_scenarios import BaseScenarios
+    from utils.writers import create_writer
+
+    start = time.perf_counter()
+    with create_writer("direct", dedup=case["dedup"]) as writer:
+        files, written = BaseScenarios(writer=writer).generate_scale_files(target_files=case["files"],
+                                                                           duplicates=case["duplicates"])
+    return files, written, [time.perf_counter() - start]
+
+
+def _run_large_file_case(case, secrets):
+    from scenarios.base_scenarios import BaseScenarios
+
+    start = time.perf_counter()
+    # The default placements leave out chunk_boundary when the file is too small for it.
+    BaseScenarios().generate_large_files(sizes=(case["size"],), fill=case.get("fill", "stream"))
+    return 1, case["size"], [time.perf_counter() - start]
+
+
+def _run_tabular_case(case, secrets):
+    from scenarios.base_scenarios import BaseScenarios
+
+    start = time.perf_counter()
+    manifest, = BaseScenarios().generate_tabular_files(formats=(case["format"],), size=case["size"])
+    return 1, manifest["size"], [time.perf_counter() - start]
+
+
+def _run_corpus_case(case, secrets):
+    from scenarios.scenario_runner import ScenarioRunner
+    from utils.instrumentation import instrumentation
+
+    ScenarioRunner(workers=case["workers"]).run()
+    # Per-file latencies come from the write histogram, so they are bucket upper bounds.
+    histogram = {"p50": None, "p99": None}
+    for item in instrumentation.snapshot()["histograms"]:
+        if item["name"] == "write_seconds":
+            histogram = item
+    return instrumentation.totals("files_written"), instrumentation.totals("bytes_written"), histogram
+
+
+CASE_RUNNERS = {
+    "tools": _run_tools_case,
+    "writer": _run_scale_case,
+    "large_file": _run_large_file_case,
+    "tabular": _run_tabular_case,
+    "encoding": _run_scale_case,
+    "format": _run_scale_case,
+    "topology": _run_topology_case,
+    "dedup": _run_dedup_case,
+    "corpus": _run_corpus_case,
+}
+
+
+def run_case(case):
+    """Runs one case in the current process and working directory and returns its measurements."""
+    import logging
+    import scenarios.scenario_runner  # Imported up front so module loading is not part of the timings.
+    from utils.instrumentation import instrumentation
+
+    # Logging would dominate the timings; only warnings and errors are kept.
+    logging.root.setLevel(logging.WARNING)
+    instrumentation.configure(enabled=case["kind"] == "corpus")
+    with open(SECRETS_PATH, encoding="utf-8") as secrets_file:
+        secrets = json.load(secrets_file)
+
+    start = time.perf_counter()
+    files, written, latencies = CASE_RUNNERS[case["kind"]](case, secrets)
+    elapsed = time.perf_counter() - start
+    if isinstance(latencies, dict):
+        p50, p99 = latencies["p50"], latencies["p99"]
+    else:
+        p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+    return {
+        "files": files,
+        "bytes": written,
+        "seconds": elapsed,
+        "files_per_second": files / elapsed if elapsed else None,
+        "mb_per_second": written / elapsed / (1 << 20) if elapsed else None,
+        "p50_seconds": p50,
+        "p99_seconds": p99,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def run_case_in_subprocess(case, target_path, secrets_path):
+    """Runs a case in a fresh interpreter inside a scratch folder on the target and returns its measurements."""
+    work_dir = tempfile.mkdtemp(prefix="secret-bench-", dir=target_path)
+    try:
+        secrets_copy = os.path.join(work_dir, SECRETS_PATH)
+        os.makedirs(os.path.dirname(secrets_copy), exist_ok=True)
+        shutil.copyfile(secrets_path, secrets_copy)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (REPOSITORY_ROOT, os.environ.get("PYTHONPATH")))))
+        completed = subprocess.run([sys.executable, "-m", "benchmarks.run_benchmarks", "--case", json.dumps(case)],
+                                   cwd=work_dir, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Case {case} failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare(results, baseline, max_regression):
+    """Returns (key, baseline files/sec, current files/sec) for every case slower than the baseline allows."""
+    previous = {item["key"]: item for item in baseline["results"]}
+    regressions = []
+    for item in results:
+        old = previous.get(item["key"])
+        if not old or not old.get("files_per_second") or not item.get("files_per_second"):
+            continue
+        if item["files_per_second"] < old["files_per_second"] * (1 - max_regression):
+            regressions.append((item["key"], old["files_per_second"], item["files_per_second"]))
+    return regressions
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark file generation throughput, latency and memory.")
+    parser.add_argument("--secrets", default=SECRETS_PATH, help="Secrets file the scenarios generate files from.")
+    parser.add_argument("--targets", default=None,
+                        help="Comma separated name=path filesystems to run on (default: tmpfs and the temp folder).")
+    parser.add_argument("--files", type=_int_list, default=[1000, 10000], help="Comma separated file counts.")
+    parser.add_argument("--large-sizes", type=_int_list, default=[16 << 20, 256 << 20],
+                        help="Comma separated sizes of the large-file cases, in bytes.")
+    parser.add_argument("--tabular-sizes", type=_int_list, default=[256 << 20],
+                        help="Comma separated sizes of the CSV/JSON/JSONL table cases, in bytes.")
+    parser.add_argument("--encodings", default=",".join(ENCODING_CHAINS),
+                        help="Comma separated encoding chains of the encoding cases, e.g. base64,gzip|base64.")
+    parser.add_argument("--workers", type=_int_list, default=[1, 4, 16],
+                        help="Comma separated worker counts of the full corpus cases.")
+    parser.add_argument("--kinds", default=",".join(CASE_RUNNERS), help="Comma separated case kinds to run.")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to.")
+    parser.add_argument("--baseline", default=None, help="Earlier results to check for regressions.")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed drop of files/sec against the baseline, as a fraction.")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.case is not None:
+        # Subprocess mode: run a single case and print its measurements as the last line.
+        print(json.dumps(run_case(json.loads(args.case))))
+        return 0
+
+    if not os.path.isfile(args.secrets):
+        raise SystemExit(f"Secrets file '{args.secrets}' not found; pass it with --secrets")
+    if any(size < 1 for size in args.large_sizes + args.tabular_sizes):
+        raise SystemExit("--large-sizes and --tabular-sizes must be positive byte counts")
+    secrets_path = os.path.abspath(args.secrets)
+    if args.targets:
+        targets = [tuple(item.split("=", 1)) for item in args.targets.split(",")]
+    else:
+        targets = default_targets()
+    kinds = set(args.kinds.split(","))
+    cases = [case for case in build_cases(args.files, args.large_sizes, args.workers, args.tabular_sizes,
+                                          [encoding for encoding in args.encodings.split(",") if encoding]) if case["kind"] in kinds]
+
+    results = []
+    failed = []
+    for target_name, target_path in targets:
+        for case in cases:
+            key = case_key(case, target_name)
+            try:
+                measurements = run_case_in_subprocess(case, target_path, secrets_path)
+            except RuntimeError as e:
+                # A failing case is recorded and the rest of the suite still runs.
+                results.append({"key": key, "target": target_name, **case, "error": str(e)})
+                failed.append(key)
+                print(f"{key}: FAILED\n{e}")
+                continue
+            results.append({"key": key, "target": target_name, **case, **measurements})
+            print(f"{key}: {measurements['files_per_second']:.0f} files/sec, {measurements['mb_per_second']:.2f} MB/sec, "
+                  f"p50 {measurements['p50_seconds']}, p99 {measurements['p99_seconds']}, "
+                  f"peak RSS {measurements['peak_rss_bytes']}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.max_regression)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old:.0f} -> {new:.0f} files/sec")
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,13 +13,26 @@ class FileExtensionEnum(Enum):
     pem = ".pem"
     uppercase_text = ".TXT"
     doc =".docx"
+    spreadsheet = ".xlsx"
+    pdf = ".pdf"
+    presentation = ".pptx"
+    email = ".eml"
 
 
     def __init__(self,suffix):
         self.suffix = suffix
 
+# Rich document formats; scenarios only generate them when they list them in their suffixes.
+RICH_DOCUMENT_EXTENSIONS = (FileExtensionEnum.spreadsheet, FileExtensionEnum.pdf, FileExtensionEnum.presentation,
+                            FileExtensionEnum.email)
+
 class FileExtensionHandler:
     @property
     def return_enum_list(self):
-        """Return a list of all file suffixes."""
-        return [suffix.value for suffix in FileExtensionEnum]
\ No newline at end of file
+        """Return a list of the file suffixes generated by default."""
+        return [suffix.value for suffix in FileExtensionEnum if suffix not in RICH_DOCUMENT_EXTENSIONS]
+
+    @property
+    def return_rich_document_list(self):
+        """Return a list of the rich document suffixes (XLSX, PDF, PPTX, EML)."""
+        return [suffix.value for suffix in RICH_DOCUMENT_EXTENSIONS]
\ No newline at end of file
@@ -1,5 +1,224 @@
+import argparse
+
+from config.file_extension_enum import FileExtensionEnum
 from scenarios.base_scenarios import BaseScenarios
+from utils.incremental import GenerationState
+from utils.instrumentation import instrumentation
+from utils.large_file import DEFAULT_CHUNK_SIZE, fits_chunk_boundary
+from utils.logger import setup_logger
+from utils.manifest import create_manifest
+from utils.sharding import Shard
+from utils.topology import TreeTopology
+from utils.writers import create_writer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate files containing secrets for scanner testing.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Run every scenario concurrently on a pool with this many workers (with --async-io, the "
+                             "I/O threads). Scale, large-file and tabular runs are single-process.")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="Pool type used together with --workers.")
+    parser.add_argument("--scale-files", type=int, default=None,
+                        help="Scale mode: number of files to generate.")
+    parser.add_argument("--scale-bytes", type=int, default=None,
+                        help="Scale mode: stop once this many bytes have been written.")
+    parser.add_argument("--scale-dirs", type=int, default=None,
+                        help="Scale mode: number of directories to fill.")
+    parser.add_argument("--fan-out", type=int, default=1000,
+                        help="Scale mode: number of files per directory.")
+    parser.add_argument("--topology", choices=("balanced", "deep", "flat"), default=None,
+                        help="Scale mode: spread --scale-files files over a directory tree of this shape instead of "
+                             "--fan-out files per folder.")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="With --topology, the depth of the tree.")
+    parser.add_argument("--branching", type=int, default=10,
+                        help="With --topology, the number of subfolders of every folder that has any.")
+    parser.add_argument("--file-distribution", choices=("uniform", "zipf"), default="uniform",
+                        help="With --topology, spread the files evenly, or Zipf-distributed so a few folders hold most of them.")
+    parser.add_argument("--zipf-exponent", type=float, default=1.0,
+                        help="With --file-distribution zipf, the exponent of the distribution.")
+    parser.add_argument("--topology-seed", type=int, default=0,
+                        help="With --topology, the seed choosing which folders get the most files.")
+    parser.add_argument("--writer", choices=("direct", "batched", "archive"), default="direct",
+                        help="Backend used to write the generated files.")
+    parser.add_argument("--filesystem", choices=("disk", "memory"), default="disk",
+                        help="Write to the real disk, or to an in-memory filesystem for dry runs without disk I/O.")
+    parser.add_argument("--background-io", action="store_true",
+                        help="With the batched writer, write batches on a background I/O thread.")
+    parser.add_argument("--archive", default=None,
+                        help="With the archive writer, the .zip/.tar/.tar.gz/.tar.bz2/.tar.xz file to write the corpus into.")
+    parser.add_argument("--nested-archive", choices=("zip", "tar", "tar.gz", "tar.bz2", "tar.xz"), default=None,
+                        help="With the archive writer, put the files of every folder into an inner archive of this format.")
+    parser.add_argument("--dedup", choices=("hardlink", "reflink", "copy"), default=None,
+                        help="Write every distinct file body once and the other files with it as hardlinks, reflinks or "
+                             "kernel copies of the first one.")
+    parser.add_argument("--max-links", type=int, default=None,
+                        help="With --dedup, link at most this many files to one written file before writing it again.")
+    parser.add_argument("--async-io", action="store_true",
+                        help="Generate through the asyncio engine, for high-latency filesystems such as NFS/SMB.")
+    parser.add_argument("--max-in-flight", type=int, default=64,
+                        help="With --async-io, the maximum number of concurrent write operations.")
+    parser.add_argument("--large-file-size", type=int, action="append", default=None,
+                        help="Generate a large file of this many bytes with secrets at controlled offsets (repeatable).")
+    parser.add_argument("--large-file-placements", default=None,
+                        help="Comma separated secret placements: start, middle, end, chunk_boundary or byte offsets "
+                             "(default: all four, without chunk_boundary in files under two chunks).")
+    parser.add_argument("--large-file-fill", choices=("stream", "sparse", "preallocate", "template"), default="stream",
+                        help="How the filler of large files is produced: written, left as a sparse hole, preallocated, or "
+                             "copied in the kernel from a template file.")
+    parser.add_argument("--large-file-template", default=None,
+                        help="With --large-file-fill template, the file repeated as the filler instead of the default text.")
+    parser.add_argument("--tabular-format", choices=("csv", "json", "jsonl"), action="append", default=None,
+                        help="Generate a wide and long table in this format with secrets in its cells (repeatable).")
+    parser.add_argument("--tabular-rows", type=int, default=None,
+                        help="With --tabular-format, the number of rows of every table.")
+    parser.add_argument("--tabular-size", type=int, default=1 << 30,
+                        help="With --tabular-format and no --tabular-rows, the approximate size of every table in bytes.")
+    parser.add_argument("--tabular-columns", type=int, default=16,
+                        help="With --tabular-format, the number of columns of every table.")
+    parser.add_argument("--tabular-secret-every", type=int, default=10000,
+                        help="With --tabular-format, put a secret in a random cell of every Nth row.")
+    parser.add_argument("--secrets-sample", type=int, default=None,
+                        help="Generate from a reproducible random subset of this many secrets (large-file, scale and sequential runs).")
+    parser.add_argument("--synthetic-seed", type=int, default=None,
+                        help="Scale mode: give every file a unique secret synthesized with this seed instead of reusing secrets.json.")
+    parser.add_argument("--encoding", action="append", default=None, metavar="CHAIN",
+                        help="Scale mode: encode the secrets with this chain, e.g. base64 or gzip|base64; files cycle through "
+                             "the given chains (repeatable).")
+    parser.add_argument("--suffix", action="append", default=None,
+                        help="Scale mode: generate files with this suffix only, e.g. .xlsx, .pdf, .pptx or .eml (repeatable).")
+    parser.add_argument("--duplicates", type=int, default=0,
+                        help="Scale mode: repeat every file body in this many more files, e.g. to exercise --dedup.")
+    parser.add_argument("--manifest", default=None,
+                        help="Record the ground truth of every generated file (.jsonl, or .db/.sqlite for SQLite).")
+    parser.add_argument("--incremental", default=None, metavar="STATE_FILE",
+                        help="Keep generation state in this file and only write files that are missing or changed.")
+    parser.add_argument("--metrics", default=None,
+                        help="Record timing histograms and throughput, exported to this file (.prom/.txt for Prometheus text, JSON otherwise).")
+    parser.add_argument("--shard", default=None, metavar="I/N",
+                        help="Only write shard I of N (1-based) of the scenario corpus; the N shards together write the full corpus.")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR"), default="DEBUG",
+                        help="Only log messages of this level and above; per-file messages are skipped above INFO.")
+    parser.add_argument("--log-every", type=int, default=1,
+                        help="Log only every Nth per-file message.")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    BaseScenarios().run_scenarios()
\ No newline at end of file
+    args = parse_args()
+    setup_logger(args.log_level)
+    instrumentation.configure(enabled=args.metrics is not None, log_every=args.log_every)
+    writer_options = {"background": True} if args.background_io and args.writer == "batched" else {}
+    if args.writer == "archive":
+        if not args.archive:
+            raise SystemExit("--writer archive needs --archive PATH")
+        if args.large_file_size or args.tabular_format:
+            raise SystemExit("Large and tabular files are streamed to the filesystem and cannot go into --writer archive")
+        writer_options = {"archive_path": args.archive, "nested_format": args.nested_archive}
+    else:
+        writer_options["filesystem"] = args.filesystem
+        if args.dedup:
+            writer_options.update(dedup=args.dedup, max_links=args.max_links)
+    scale_mode = args.scale_files is not None or args.scale_bytes is not None or args.scale_dirs is not None
+    runner_mode = args.workers is not None and not (args.large_file_size or args.tabular_format or args.async_io or scale_mode)
+    if args.workers is not None and not args.async_io and (scale_mode or args.large_file_size or args.tabular_format):
+        raise SystemExit("--workers only applies to scenario runs and --async-io; scale, large-file and tabular runs "
+                         "are single-process")
+    if args.topology and (not scale_mode or args.async_io or args.scale_files is None or args.scale_dirs is not None):
+        raise SystemExit("--topology needs --scale-files, without --scale-dirs or --async-io")
+    if args.encoding and not scale_mode:
+        raise SystemExit("--encoding only applies to scale mode; scenarios list their encodings in config/scenarios.json")
+    if args.async_io and (args.writer != "direct" or args.background_io):
+        raise SystemExit("--async-io writes through its own asyncio writer; drop --writer and --background-io")
+    if args.dedup and (args.writer == "archive" or args.async_io):
+        raise SystemExit("--dedup needs the direct or batched writer, without --async-io")
+    if args.duplicates and not scale_mode:
+        raise SystemExit("--duplicates only applies to scale mode")
+    if args.suffix and not scale_mode:
+        raise SystemExit("--suffix only applies to scale mode; scenarios list their suffixes in config/scenarios.json")
+    unknown_suffixes = set(args.suffix or ()) - {extension.suffix for extension in FileExtensionEnum}
+    if unknown_suffixes:
+        raise SystemExit(f"Unknown suffixes {sorted(unknown_suffixes)}")
+    placements = None
+    if args.large_file_placements:
+        placements = [int(item) if item.lstrip("-").isdigit() else item for item in args.large_file_placements.split(",")]
+        if "chunk_boundary" in placements and not all(fits_chunk_boundary(size) for size in args.large_file_size or ()):
+            raise SystemExit(f"The chunk_boundary placement needs --large-file-size of at least {2 * DEFAULT_CHUNK_SIZE} bytes")
+    shard = None
+    if args.shard:
+        if args.large_file_size or args.tabular_format or args.async_io or scale_mode:
+            raise SystemExit("--shard only applies to scenario runs")
+        try:
+            shard = Shard.parse(args.shard)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    # The scenario runner opens the manifest itself, since process workers record into partial manifests.
+    manifest = create_manifest(args.manifest, keep_existing=args.incremental is not None) if args.manifest and not runner_mode else None
+    state = GenerationState(args.incremental) if args.incremental and not runner_mode else None
+    try:
+        if args.large_file_size:
+            with create_writer(args.writer, **writer_options) as writer:
+                scenarios = BaseScenarios(writer=writer, manifest=manifest, secrets_sample=args.secrets_sample)
+                try:
+                    scenarios.generate_large_files(sizes=args.large_file_size, placements=placements,
+                                                   fill=args.large_file_fill, template_path=args.large_file_template)
+                except ValueError as e:
+                    # Offsets given on the command line that do not fit the file or overlap.
+                    raise SystemExit(str(e))
+        elif args.tabular_format:
+            with create_writer(args.writer, **writer_options) as writer:
+                scenarios = BaseScenarios(writer=writer, manifest=manifest, secrets_sample=args.secrets_sample)
+                scenarios.generate_tabular_files(formats=args.tabular_format, rows=args.tabular_rows,
+                                                 size=args.tabular_size, columns=args.tabular_columns,
+                                                 secret_every=args.tabular_secret_every)
+        elif args.async_io:
+            # asyncio and the runner are only loaded by the modes that use them.
+            from scenarios.async_engine import AsyncGenerationEngine
+            from utils.secret_synthesizer import SecretSynthesizer
+
+            synthesizer = SecretSynthesizer(seed=args.synthetic_seed) if args.synthetic_seed is not None else None
+            engine = AsyncGenerationEngine(max_in_flight=args.max_in_flight, io_workers=args.workers or 32,
+                                           manifest=manifest, state=state, filesystem=args.filesystem,
+                                           secrets_sample=args.secrets_sample, synthesizer=synthesizer)
+            if scale_mode:
+                engine.generate_scale_files(target_files=args.scale_files, target_bytes=args.scale_bytes,
+                                            target_dirs=args.scale_dirs, fan_out=args.fan_out, encodings=args.encoding or (),
+                                            duplicates=args.duplicates, suffixes=args.suffix)
+            else:
+                engine.run_scenarios()
+        elif scale_mode:
+            from utils.secret_synthesizer import SecretSynthesizer
+
+            with create_writer(args.writer, **writer_options) as writer:
+                synthesizer = SecretSynthesizer(seed=args.synthetic_seed) if args.synthetic_seed is not None else None
+                topology = None
+                if args.topology:
+                    topology = TreeTopology(shape=args.topology, depth=args.depth, branching=args.branching,
+                                            distribution=args.file_distribution, zipf_exponent=args.zipf_exponent,
+                                            seed=args.topology_seed)
+                scenarios = BaseScenarios(writer=writer, manifest=manifest, state=state, secrets_sample=args.secrets_sample,
+                                          synthesizer=synthesizer)
+                scenarios.generate_scale_files(target_files=args.scale_files, target_bytes=args.scale_bytes,
+                                               target_dirs=args.scale_dirs, fan_out=args.fan_out,
+                                               encodings=args.encoding or (), topology=topology,
+                                               duplicates=args.duplicates, suffixes=args.suffix)
+        elif not runner_mode:
+            with create_writer(args.writer, **writer_options) as writer:
+                scenarios = BaseScenarios(writer=writer, manifest=manifest, state=state, secrets_sample=args.secrets_sample,
+                                          shard=shard)
+                scenarios.run_scenarios()
+        else:
+            from scenarios.scenario_runner import ScenarioRunner
+
+            ScenarioRunner(workers=args.workers, executor=args.executor, writer_name=args.writer,
+                           writer_options=writer_options, manifest_path=args.manifest,
+                           state_path=args.incremental, shard=shard).run()
+    finally:
+        if manifest is not None:
+            manifest.close()
+        if state is not None:
+            state.close()
+    if args.metrics:
+        instrumentation.log_summary()
+        instrumentation.export(args.metrics)
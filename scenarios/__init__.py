@@ -1,2 +0,0 @@
-from utils import logger
-logger.setup_logger()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, wait
+
+from scenarios.base_scenarios import BaseScenarios
+from scenarios.scenario_runner import ScenarioRunner
+from utils.filesystem import resolve_filesystem
+from utils.instrumentation import instrumentation
+from utils.writers import BaseWriter
+
+
+class AsyncWriter(BaseWriter):
+    """Writer that hands every write to the engine's event loop instead of blocking the scenario loop on it."""
+
+    name = "async"
+
+    def __init__(self, engine, max_pending=256):
+        super().__init__(engine.filesystem)
+        self.engine = engine
+        # Producers block here once max_pending writes are queued or running (backpressure).
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._error = None
+
+    def write(self, full_path, data) -> None:
+        self._slots.acquire()
+        future = asyncio.run_coroutine_threadsafe(self.engine.write(full_path, data), self.engine.loop)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._on_done)
+
+    def flush(self) -> None:
+        # Must be called from a worker thread, never from the event loop itself.
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _on_done(self, future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
+        # exception() raises on a cancelled future, e.g. one still pending when the loop shut down.
+        error = CancelledError("Write cancelled") if future.cancelled() else future.exception()
+        if error is not None and self._error is None:
+            self._error = error
+
+
+class AsyncGenerationEngine:
+    """Runs scenarios as coroutines on an asyncio loop, with blocking writes sent to a bounded executor.
+
+    Throughput on high-latency mounts scales with max_in_flight instead of with the latency of each open().
+    """
+
+    def __init__(self, io_workers=32, max_in_flight=64, max_pending=256, scenario_workers=4, manifest=None, state=None,
+                 filesystem=None, secrets_sample=None, synthesizer=None):
+        self.io_workers = io_workers
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.scenario_workers = scenario_workers
+        self.manifest = manifest
+        self.state = state
+        # Passed to BaseScenarios: a subset of the catalog, and unique synthesized secrets for scale mode.
+        self.secrets_sample = secrets_sample
+        self.synthesizer = synthesizer
+        # Filesystem every write goes to (see utils.filesystem); the real disk by default.
+        self.filesystem = resolve_filesystem(filesystem)
+        self.loop = None
+        self.scenarios = None
+        self._in_flight = None
+        self._io_executor = None
+        self._scenario_executor = None
+
+    def run_scenarios(self, scenario_names=None):
+        """Runs the given scenarios (all discovered ones by default) and returns the names that failed."""
+        return asyncio.run(self._with_engine(self._run_scenarios, scenario_names))
+
+    def generate_scale_files(self, target_files=None, target_bytes=None, target_dirs=None, fan_out=1000, encodings=(),
+                             duplicates=0, suffixes=None):
+        """Scale mode on the async pipeline; returns the number of files and bytes written."""
+        if target_dirs is not None:
+            target_files = target_dirs * fan_out if target_files is None else min(target_files, target_dirs * fan_out)
+        if target_files is None and target_bytes is None:
+            raise ValueError("Scale mode needs a target file count, total bytes or directory count")
+        return asyncio.run(self._with_engine(self._generate_scale_files, target_files, target_bytes, fan_out, encodings,
+                                               duplicates, suffixes))
+
+    async def write(self, full_path, data) -> None:
+        """Writes a file on the I/O executor while holding one of the in-flight slots."""
+        async with self._in_flight:
+            with instrumentation.timer("async_write_seconds"):
+                await self.loop.run_in_executor(self._io_executor, self.filesystem.write_file, full_path, data)
+
+    async def _with_engine(self, coroutine_function, *args):
+        self.loop = asyncio.get_running_loop()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="async-io")
+        self._scenario_executor = ThreadPoolExecutor(max_workers=self.scenario_workers, thread_name_prefix="async-scenario")
+        try:
+            writer = AsyncWriter(self, max_pending=self.max_pending)
+            create_scenarios = functools.partial(BaseScenarios, writer, self.manifest, self.state,
+                                                 secrets_sample=self.secrets_sample, synthesizer=self.synthesizer)
+            self.scenarios = await self.loop.run_in_executor(self._scenario_executor, create_scenarios)
+            return await coroutine_function(*args)
+        finally:
+            self._scenario_executor.shutdown(wait=True)
+            self._io_executor.shutdown(wait=True)
+
+    async def _run_scenarios(self, scenario_names):
+        scenario_names = list(scenario_names or ScenarioRunner.discover_scenarios())
+        logging.info(f"Running {len(scenario_names)} scenarios with up to {self.max_in_flight} writes in flight")
+        results = await asyncio.gather(*(self._run_scenario(name) for name in scenario_names), return_exceptions=True)
+
+        failed = []
+        for name, result in zip(scenario_names, results):
+            if isinstance(result, Exception):
+                logging.error(f"Scenario '{name}' failed: {result}")
+                failed.append(name)
+        return failed
+
+    async def _run_scenario(self, scenario_name):
+        # The scenario loop runs on a worker thread; its writes come back to this loop through AsyncWriter.
+        await self.loop.run_in_executor(self._scenario_executor, self.scenarios.run_scenario, scenario_name)
+        await self.loop.run_in_executor(self._scenario_executor, self.scenarios.tools.writer.flush)
+
+    async def _generate_scale_files(self, target_files, target_bytes, fan_out, encodings, duplicates, suffixes):
+        # A bounded queue between the spec producer and the render workers keeps memory flat.
+        specs = asyncio.Queue(maxsize=self.max_pending)
+        totals = {"files": 0, "bytes": 0}
+        done = asyncio.Event()
+
+        async def produce():
+            for spec in self.scenarios.iter_scale_file_specs(target_files=target_files, fan_out=fan_out, encodings=encodings,
+                                                             duplicates=duplicates, suffixes=suffixes):
+                if done.is_set():
+                    break
+                await specs.put(spec)
+            for _ in range(self.scenario_workers):
+                await specs.put(None)
+
+        async def consume():
+            while True:
+                spec = await specs.get()
+                if spec is None:
+                    return
+                if done.is_set():
+                    continue
+                written = await self.loop.run_in_executor(self._scenario_executor, self.scenarios.write_file_spec, spec)
+                totals["files"] += 1
+                totals["bytes"] += written
+                if target_bytes is not None and totals["bytes"] >= target_bytes:
+                    done.set()
+
+        await asyncio.gather(produce(), *(consume() for _ in range(self.scenario_workers)))
+        await self.loop.run_in_executor(self._scenario_executor, self.scenarios.tools.writer.flush)
+        logging.info(f"Scale mode generated {totals['files']} files ({totals['bytes']} bytes)")
+        return totals["files"], totals["bytes"]
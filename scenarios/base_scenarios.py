@@ -1,357 +1,278 @@
+import logging
+
 from config.file_extension_enum import FileExtensionEnum, FileExtensionHandler
+from scenarios.file_spec import FileSpec
+from scenarios.scenario_engine import ScenarioEngine
+from scenarios.scenario_spec import load_scenario_specs
+from utils.incremental import scenario_input_hash
 from utils.decorators import log_function_status
+from utils.instrumentation import instrumentation
+from utils.large_file import DEFAULT_CHUNK_SIZE, default_placements
+from utils.secret_encodings import encoding_chain
+from utils.secrets_store import SecretsStore
 from utils.tools import Tools
 
+# Catalog of the secrets the scenarios generate files from (JSON array or JSONL).
+SECRETS_PATH = r"config\secrets.json"
+# Root folder of the files generated by scale mode.
+SCALE_FOLDER_PATH = "generated_files\\scale\\"
+# Folder of the large files with secrets at controlled offsets.
+LARGE_FILES_FOLDER_PATH = "generated_files\\large_files\\"
+# Folder of the wide and long CSV/JSON/JSONL tables.
+TABULAR_FOLDER_PATH = "generated_files\\tabular\\"
+# Root folder of the scale mode trees with a parametrized topology.
+TOPOLOGY_FOLDER_PATH = "generated_files\\topology\\"
+
 
 class BaseScenarios:
-    def __init__(self):
-        # Initialize tools for file handling and read JSON data from the specified file path containing secret information.
-        self.tools = Tools()
-        self.__data = self.tools.read_json_file(r"config\secrets.json")
+    def __init__(self, writer=None, manifest=None, state=None, secrets_path=SECRETS_PATH, secrets_sample=None,
+                 synthesizer=None, shard=None):
+        # Initialize tools for file handling and open the catalog of secrets; entries are decoded lazily on use.
+        self.tools = Tools(writer=writer, manifest=manifest)
+        self.__data = SecretsStore(secrets_path)
+        if secrets_sample is not None:
+            # A reproducible subset of a large catalog, kept in memory.
+            self.__data = self.__data.sample(secrets_sample, seed=0)
+        # Optional SecretSynthesizer giving every scale mode file a unique secret (see utils.secret_synthesizer).
+        self.synthesizer = synthesizer
         # Retrieve the list of file suffixes to consider for different file types.
         self.suffix_list = FileExtensionHandler().return_enum_list
+        # Declarative scenario definitions and the engine that runs them.
+        self.scenario_specs = load_scenario_specs()
+        self.engine = ScenarioEngine(self.tools, self.__data, self.suffix_list, state=state, shard=shard)
+        # Optional GenerationState of an incremental run, shared with the engine.
+        self.state = state
+        # Optional Shard of a sharded run, shared with the engine (see utils.sharding).
+        self.shard = shard
+
+    def run_scenario(self, name) -> int:
+        """Runs a scenario by name, from its declarative spec when one exists."""
+        spec = self.scenario_specs.get(name)
+        with instrumentation.timer("scenario_seconds", scenario=name):
+            if spec is None:
+                # Scenarios without a spec cannot be split by file, so one shard runs them whole.
+                if self.shard is not None and not self.shard.owns(name):
+                    return 0
+                return getattr(self, name)()
+            if self.state is None:
+                return self.engine.run(spec)
+
+            input_hash = scenario_input_hash(spec, self.__data, self.shard)
+            # A missing or changed file sends the scenario back through the engine's per-file checks.
+            if self.state.is_scenario_done(name, input_hash) and self.engine.is_current(spec):
+                logging.info(f"Skipping scenario '{name}', it is up to date")
+                return 0
+            written = self.engine.run(spec)
+            # The scenario only counts as done once all of its files are on disk.
+            self.tools.writer.flush()
+            self.state.mark_scenario_done(name, input_hash)
+            return written
+
+    def run_scenario_specs(self, names=None, workers=1) -> int:
+        """Plans the given declarative scenarios (all by default) as one set and writes their files."""
+        names = names or list(self.scenario_specs)
+        return self.engine.run_all((self.scenario_specs[name] for name in names), workers=workers)
 
     @log_function_status
     def generate_all_single_examples_txt_lower_files(self):
-        folder_path = "generated_files\\text_lower\\"
-        # Generate text files for each secret with lowercase '.txt' extension.
-        for secret in self.__data:
-            # Create a file name using the secret's name and the '.txt' extension.
-            file_name = secret["name"] + FileExtensionEnum.lowercase_text.suffix
-            # Create the file with the example text from the secret.
-            self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret["example"])
+        self.run_scenario("generate_all_single_examples_txt_lower_files")
 
     @log_function_status
     def generate_ten_single_examples_txt_upper_files(self):
-        folder_path = "generated_files\\text_upper\\"
-        # Generate text files for each secret with lowercase '.txt' extension.
-        for index,secret in enumerate(self.__data):
-            if index == 10: return  # Stop after generating five examples.
-            # Create a file name using the secret's name and the '.txt' extension.
-            file_name = secret["name"] + FileExtensionEnum.uppercase_text.suffix
-            # Create the file with the example text from the secret.
-            self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret["example"])
+        self.run_scenario("generate_ten_single_examples_txt_upper_files")
 
     @log_function_status
     def generate_five_single_examples(self):
-        folder_path = "generated_files\\generic_five\\"
-        # Generate five single example files using various suffixes.
-        for index, secret in enumerate(self.__data):
-            if index == 4: return  # Stop after generating five examples.
-            for suffix in self.suffix_list:
-                # Generate secret text based on the current suffix and secret object.
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the secret's name and the appropriate suffix.
-                file_name = secret["name"] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret, is_hidden=False)
-
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_five_single_examples")
 
     @log_function_status
     def generate_numeric_name_files(self):
-        folder_path = "generated_files\\numeric\\"
-        # Generate files with numeric names based on the index.
-        for index, secret in enumerate(self.__data):
-            if index == 1: return  # Limit to the first two files.
-            for suffix in self.suffix_list:
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the numeric index and the appropriate suffix.
-                file_name = f"{str(index)} + {suffix}"
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret, is_hidden=False)
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_numeric_name_files")
 
     @log_function_status
     def generate_hebrew_letters(self):
-        folder_path = "generated_files\\hebrew\\"
-        """Generate text files using Hebrew names; first three as '.txt', the rest as '.TXT'."""
-        heb_name = "יונתן"  # Example Hebrew name.
-        for index, secret in enumerate(self.__data):
-            if index == 4: return  # Limit to the first four files.
-            for suffix in self.suffix_list:
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the Hebrew name and the appropriate suffix.
-                file_name = heb_name + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret, is_hidden=False)
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_hebrew_letters")
 
     @log_function_status
     def generate_special_chars_single_examples(self):
-        folder_path = "generated_files\\special_chars\\"
-        # Generate text files using special character names.
-        special_char_list = [
-            r"!@#$%^^&()", r"asdasd!@#!@#!", r"asdad@!#^&&(asdad",
-            r"adsas.asda.!@#!@.sad", r"🍕!@#asd@!#", r"🌍"
-        ]
-        for index, secret in enumerate(self.__data):
-            if index == 6: return  # Limit to the first six files.
-            for suffix in self.suffix_list:
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the special character from the list and the appropriate suffix.
-                file_name = special_char_list[index] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret, is_hidden=False)
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_special_chars_single_examples")
 
     @log_function_status
     def recycle_bin_different_files(self):
-        folder_path = "generated_files\\different_files\\"
-        """Generate text files with names meant for a recycle bin scenario."""
-        recycle_bin_list = [
-            r"!@#$%^^&()", r"יותם", r"lorem_ipsum",
-            r"Lorem ipsum dolor sit amet, consectetur adipiscing elit. Phasellus imperdiet, nulla et dictum interdum, nisi lorem egestas odio, vitae scelerisque enim ligula venenatis dolor",
-            r"Loremipsumdolorsitamet,consecteturadipiscingelit.Phasellusimperdiet,nullaetdictuminterdum,nisiloremegestaodio,vitaesceleriqueenimligulavenenatisdolor",
-            r"."
-        ]
-        # Create a reverse generator for recycling bin file names.
-        generator = self.tools.reverse_generator(recycle_bin_list)
-        for index, secret in enumerate(self.__data):
-            if index == len(recycle_bin_list) - 1: return  # Limit to the length of recycle bin list.
-            gen_data = next(generator)  # Get the next name from the generator.
-            for suffix in self.suffix_list:
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the generated name and the appropriate suffix.
-                file_name = gen_data + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name, recycle_bin=True)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name, recycle_bin=True)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret, recycle_bin=True)
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text, recycle_bin=True)
+        self.run_scenario("recycle_bin_different_files")
 
     @log_function_status
     def generate_hidden_files_windows(self):
-        folder_path = "generated_files\\hidden_files_windows\\"
-        # Generate hidden files on Windows using secret data.
-        for index, secret in enumerate(self.__data):
-            if index == 1: return  # Limit to the length of recycle bin list.
-
-            for suffix in self.suffix_list:
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the generated name and the appropriate suffix.
-                file_name = secret["name"] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name,is_hidden=True)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name,is_hidden=True)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret, is_hidden=True)
-                else:
-                    self.tools.create_hidden_file_windows(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_hidden_files_windows")
 
     @log_function_status
     def generate_hidden_files_windows_to_recycle_bin(self):
-        folder_path = "generated_files\\hidden_recycle\\"
-        # Generate hidden files on Windows using secret data.
-        for index, secret in enumerate(self.__data):
-            if index == 1: return  # Limit to the length of recycle bin list.
-
-            for suffix in self.suffix_list:
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the generated name and the appropriate suffix.
-                file_name = secret["name"] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name, recycle_bin=True,is_hidden=True)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name, recycle_bin=True, is_hidden=True)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret, is_hidden=True, recycle_bin=True)
-                else:
-                    self.tools.create_hidden_file_windows(file_name=file_name, text=secret_text,recycle_bin=True)
-
+        self.run_scenario("generate_hidden_files_windows_to_recycle_bin")
 
     @log_function_status
     def generate_file_with_secret_in_mid_text_spaces(self):
-        folder_path = "generated_files\\space\\"
-        # Generate text file with secret in mid-text with spaces
-        for index,secret in enumerate(self.__data):
-            if index==1:return
-            # Create a file name using the secret's name and the '.txt' extension.
-            file_name = secret["name"] + FileExtensionEnum.lowercase_text.suffix
-            secret_text = f"Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco {secret['example']} laboris nisi ut aliquip ex ea commodo consequat. Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur. Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit anim id est laborum."
-            # Create the file with the example text from the secret.
-            self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_file_with_secret_in_mid_text_spaces")
 
     @log_function_status
     def generate_file_with_secret_in_mid_text_no_spaces(self):
-        folder_path = "generated_files\\no_space\\"
-        # Generate text file with secret in mid-text without spaces
-        for index,secret in enumerate(self.__data):
-            if index==1:return
-            # Create a file name using the secret's name and the '.txt' extension.
-            file_name = secret["name"] + FileExtensionEnum.lowercase_text.suffix
-            secret_text = f"ipexeacommodoconsequat.Duisauteiruredolorinreprehenderitinvoluptatevelitessecillumdoloreeufugiatnullapariatur.Excepteur sintoccaecatcupidatatnonproident,suntinculpaquiofficiadeseruntmollitanimidestlabor{secret['example']}Loremipsumdolorsitamet,consecteturadipiscingelit.Seddoeiusmodtemporincididuntutlaboreetdoloremagnaaliqua.Utenimadminimveniam,quisnostrudexercitationullamcolaborisnisiutaliq"
-            # Create the file with the example text from the secret.
-            self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_file_with_secret_in_mid_text_no_spaces")
 
     @log_function_status
     def several_secrets_in_one_file(self):
-        folder_path = "generated_files\\several_secrets\\"
-        secrets = ""
-        secret_objs = {}
-        for index, secret in enumerate(self.__data):
-            if index ==5: break
-            secrets +=secret["example"]
-            secret_objs[index] = secret
-
-
-        for suffix in self.suffix_list:
-            secret_text = self.tools.generate_secret_text_formatted(suffix=suffix, secrets=secrets)
-            file_name = suffix[1:] + suffix
-            # Write data to file based on the suffix type.
-            if "json" in suffix:
-                pass
-            elif "csv" in suffix:
-                pass
-            elif "docx" in suffix:
-                pass
-                #self.tools.create_doc_file(secret=secret, is_hidden=False)
-            else:
-                self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
-
+        self.run_scenario("several_secrets_in_one_file")
 
     @log_function_status
     def generate_hidden_files_nested_dir(self):
-        folder_path = "generated_files\\dir1\\dir2\\dir3\\dir4\\dir5\\dir6\\dir7\\dir8\\dir9\\dir10\\nested_hidden\\"
-        # Generate hidden files on Windows using secret data.
-        for index, secret in enumerate(self.__data):
-            if index == 1: return  # Limit to the length of recycle bin list.
-
-            for suffix in self.suffix_list:
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the generated name and the appropriate suffix.
-                file_name = secret["name"] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name, is_hidden=True)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name, is_hidden=True)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(secret=secret, is_hidden=False)
-                else:
-                    self.tools.create_hidden_file_windows(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_hidden_files_nested_dir")
 
     @log_function_status
     def generate_single_examples_nested_dir(self):
-        folder_path = "generated_files\\dir1\\dir2\\dir3\\dir4\\dir5\\dir6\\dir7\\dir8\\dir9\\dir10\\nested\\"
-        # Generate five single example files using various suffixes.
-        for index, secret in enumerate(self.__data):
-            if index == 1: return
-            for suffix in self.suffix_list:
-                # Generate secret text based on the current suffix and secret object.
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the secret's name and the appropriate suffix.
-                file_name = secret["name"] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(secret=secret)
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+        self.run_scenario("generate_single_examples_nested_dir")
 
+    @log_function_status
+    def hidden_folder_with_file(self):
+        self.run_scenario("hidden_folder_with_file")
 
+    @log_function_status
+    def hidden_folder_with_file_hidden(self):
+        self.run_scenario("hidden_folder_with_file_hidden")
 
     @log_function_status
-    def hidden_folder_with_file(self):
-        folder_path = "generated_files\\is_hidden_folder\\"
-        self.tools.create_hidden_directory(folder_path)
-        # Generate hidden_folder_with_file
-        for index, secret in enumerate(self.__data):
-            if index == 1: return
-            for suffix in self.suffix_list:
-                # Generate secret text based on the current suffix and secret object.
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the secret's name and the appropriate suffix.
-                file_name = secret["name"] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(secret=secret)
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path,file_name=file_name, text=secret_text)
+    def generate_single_examples_japanese_file_name_folder(self):
+        self.run_scenario("generate_single_examples_japanese_file_name_folder")
 
+    @log_function_status
+    def generate_encoded_secrets(self):
+        self.run_scenario("generate_encoded_secrets")
 
+    @log_function_status
+    def generate_rich_documents(self):
+        self.run_scenario("generate_rich_documents")
 
     @log_function_status
-    def hidden_folder_with_file_hidden(self):
-        folder_path = "generated_files\\is_hidden_with_file\\"
-        self.tools.create_hidden_directory(folder_path)
-        # Generate hidden_folder_with_file_hidden
-        for index, secret in enumerate(self.__data):
-            if index == 1: return
-            for suffix in self.suffix_list:
-                # Generate secret text based on the current suffix and secret object.
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the secret's name and the appropriate suffix.
-                file_name = secret["name"] + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name,is_hidden=True)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path,data=secret_text, file_name=file_name,is_hidden=True)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(secret=secret, is_hidden=True)
-                else:
-                    self.tools.create_hidden_file_windows(folder_path=folder_path,file_name=file_name, text=secret_text)
+    def generate_large_files(self, sizes=(16 << 20,), placements=None, chunk_size=None, fill="stream", template_path=None):
+        """Generates one large text file per size, with secrets at every placement and a manifest of their offsets.
+
+        Without placements, every named placement that fits the size is used (see utils.large_file.default_placements).
+        """
+        manifests = []
+        for size in sizes:
+            file_name = f"large_{size}{FileExtensionEnum.lowercase_text.suffix}"
+            size_placements = placements if placements is not None else default_placements(size, chunk_size or DEFAULT_CHUNK_SIZE)
+            manifests.append(self.tools.create_large_file(folder_path=LARGE_FILES_FOLDER_PATH, file_name=file_name, size=size,
+                                                          secrets=self.__data, placements=size_placements, chunk_size=chunk_size,
+                                                          fill=fill, template_path=template_path))
+        return manifests
 
     @log_function_status
-    def generate_single_examples_japanese_file_name_folder(self):
-        folder_path = "generated_files\\秘密\\"
-        # japanese folder & file
-        for index, secret in enumerate(self.__data):
-            if index == 1: return
-            for suffix in self.suffix_list:
-                # Generate secret text based on the current suffix and secret object.
-                secret_text = self.tools.generate_secret_text(suffix=suffix, secret_obj=secret)
-                # Create a file name using the secret's name and the appropriate suffix.
-                file_name = "日本語" + suffix
-                # Write data to file based on the suffix type.
-                if "json" in suffix:
-                    self.tools.create_json_file_windows(folder_path=folder_path, data=secret_text, file_name=file_name)
-                elif "csv" in suffix:
-                    self.tools.create_csv_file_windows(folder_path=folder_path, data=secret_text, file_name=file_name)
-                elif "docx" in suffix:
-                    self.tools.create_doc_file(folder_path=folder_path,secret=secret)
-                else:
-                    self.tools.create_file_with_text(folder_path=folder_path, file_name=file_name, text=secret_text)
+    def generate_tabular_files(self, formats=("csv",), rows=None, size=None, columns=16, secret_every=10000, secret_columns=None):
+        """Generates one table per format, of the given rows or about the given size, with a manifest of its secret cells."""
+        manifests = []
+        for file_format in formats:
+            file_name = f"table_{rows if rows is not None else size}_{columns}.{file_format}"
+            manifests.append(self.tools.create_tabular_file(folder_path=TABULAR_FOLDER_PATH, file_name=file_name, rows=rows,
+                                                            size=size, secrets=self.__data, file_format=file_format,
+                                                            columns=columns, secret_every=secret_every,
+                                                            secret_columns=secret_columns))
+        return manifests
+
+    def iter_scale_file_specs(self, target_files=None, fan_out=1000, folder_path=SCALE_FOLDER_PATH, encodings=(),
+                              topology=None, duplicates=0, suffixes=None):
+        """Yields file specs cycling deterministically through secrets and suffixes; endless without target_files.
+
+        With encodings, the files cycle through those encoding chains as well (see utils.secret_encodings).
+        With a TreeTopology, the target_files files are spread over its folders under folder_path instead of
+        fan_out files per folder (see utils.topology).
+        With duplicates, every body is repeated in that many more files right after it, for dedup runs.
+        suffixes replaces the default suffixes, e.g. to generate rich documents only.
+        """
+        if topology is not None and target_files is None:
+            raise ValueError("A topology needs a target file count to spread over its folders")
+        topology_folders = topology.iter_file_folders(folder_path, target_files) if topology is not None else None
+        secrets_count = len(self.__data)
+        suffix_list = list(suffixes) if suffixes else self.suffix_list
+        suffix_count = len(suffix_list)
+        labels = [encoding_chain(encoding).label for encoding in encodings]
+        synthetic = self.synthesizer.iter_secrets() if self.synthesizer is not None else None
+        index = 0
+        while target_files is None or index < target_files:
+            # Files sharing an ordinal get the same secret, suffix and encoding, so the same body.
+            ordinal = index // (duplicates + 1)
+            if synthetic is not None:
+                # Synthesized secrets are all distinct, so each one is used once with the next suffix.
+                if index % (duplicates + 1) == 0:
+                    secret = next(synthetic)
+                suffix = suffix_list[ordinal % suffix_count]
+            else:
+                # Every secret is paired with the first suffix, then every secret with the second suffix, and so on.
+                secret = self.__data[ordinal % secrets_count]
+                suffix = suffix_list[(ordinal // secrets_count) % suffix_count]
+            file_name = f"{index:08d}_{secret['name']}"
+            encoding = None
+            if encodings:
+                # The chain label in the name tells which encoding the file holds.
+                encoding = encodings[ordinal % len(encodings)]
+                file_name += "." + labels[ordinal % len(encodings)]
+            if topology_folders is not None:
+                file_folder = next(topology_folders)
+            else:
+                file_folder = f"{folder_path}{index // fan_out:06d}\\"
+            yield FileSpec(folder_path=file_folder,
+                           file_name=file_name + suffix,
+                           suffix=suffix,
+                           secret=secret,
+                           encoding=encoding)
+            index += 1
+
+    def write_file_spec(self, spec) -> int:
+        """Writes the file described by the spec and returns its size in bytes."""
+        return self.engine.write(spec)
 
+    @log_function_status
+    def generate_scale_files(self, target_files=None, target_bytes=None, target_dirs=None, fan_out=1000, encodings=(),
+                             topology=None, duplicates=0, suffixes=None):
+        """Generates a large corpus until the target file count, total bytes or directory count is reached.
+
+        With a TreeTopology, its whole tree is created first and target_files are spread over it.
+        """
+        if topology is not None:
+            if target_files is None or target_dirs is not None:
+                raise ValueError("A topology needs a target file count and sets the directories itself")
+            # Every folder of the tree in one planned pass, parents first.
+            self.tools.writer.create_tree(topology.folder_paths(TOPOLOGY_FOLDER_PATH))
+            specs = self.iter_scale_file_specs(target_files=target_files, folder_path=TOPOLOGY_FOLDER_PATH,
+                                               encodings=encodings, topology=topology, duplicates=duplicates,
+                                               suffixes=suffixes)
+        else:
+            specs = self._plan_scale_folders(target_files, target_bytes, target_dirs, fan_out, encodings, duplicates,
+                                             suffixes)
+
+        written_files = 0
+        written_bytes = 0
+        # Specs are streamed one at a time so memory stays flat regardless of the corpus size.
+        for spec in specs:
+            written_bytes += self.write_file_spec(spec)
+            written_files += 1
+            if target_bytes is not None and written_bytes >= target_bytes:
+                break
+        self.tools.writer.flush()
+
+        logging.info(f"Scale mode generated {written_files} files ({written_bytes} bytes)")
+        return written_files, written_bytes
+
+    def _plan_scale_folders(self, target_files, target_bytes, target_dirs, fan_out, encodings, duplicates, suffixes):
+        """Creates the folders of fan_out files each and returns the specs filling them."""
+        if target_dirs is not None:
+            target_files = target_dirs * fan_out if target_files is None else min(target_files, target_dirs * fan_out)
+        if target_files is None and target_bytes is None:
+            raise ValueError("Scale mode needs a target file count, total bytes or directory count")
+
+        if target_files is not None:
+            # Create the whole directory tree up front instead of checking folders per file.
+            self.tools.writer.precreate_folders(
+                f"{SCALE_FOLDER_PATH}{index:06d}\\" for index in range((target_files + fan_out - 1) // fan_out))
+        return self.iter_scale_file_specs(target_files=target_files, fan_out=fan_out, encodings=encodings,
+                                          duplicates=duplicates, suffixes=suffixes)
 
     @log_function_status
     def run_scenarios(self):
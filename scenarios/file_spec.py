@@ -0,0 +1,13 @@
+from typing import NamedTuple, Optional
+
+
+class FileSpec(NamedTuple):
+    """Describes a single file to generate: where it goes, its name and suffix, and the secret it carries."""
+    folder_path: str
+    file_name: str
+    suffix: str
+    secret: dict
+    is_hidden: bool = False
+    recycle_bin: bool = False
+    # Optional chain of secret encodings, e.g. "gzip|base64" (see utils.secret_encodings).
+    encoding: Optional[str] = None
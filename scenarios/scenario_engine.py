@@ -0,0 +1,178 @@
+import dataclasses
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from config.file_extension_enum import FileExtensionEnum
+from scenarios.file_spec import FileSpec
+from utils.incremental import file_input_hash
+from utils.instrumentation import instrumentation
+from utils.secret_encodings import encoding_chain
+
+
+class ScenarioEngine:
+    """Plans and writes the files described by ScenarioSpec objects."""
+
+    def __init__(self, tools, secrets, suffix_list, state=None, shard=None):
+        self.tools = tools
+        self.secrets = secrets
+        self.suffix_list = suffix_list
+        # Optional GenerationState; files that are already up to date are skipped (see utils.incremental).
+        self.state = state
+        # Optional Shard; only the files whose output path it owns are written (see utils.sharding).
+        self.shard = shard
+        # Suffix -> writer, resolved once instead of checking substrings of the suffix for every file.
+        self.writers = {extension.suffix: self._resolve_writer(extension) for extension in FileExtensionEnum}
+
+    def _resolve_writer(self, extension):
+        if extension is FileExtensionEnum.json:
+            return self._write_json
+        if extension is FileExtensionEnum.csv:
+            return self._write_csv
+        if extension is FileExtensionEnum.doc:
+            return self._write_doc
+        return self._write_text
+
+    def plan(self, spec):
+        """Yields the file specs of a scenario in the order they are written."""
+        secrets = self.secrets if spec.limit is None else self.secrets[:spec.limit]
+        if spec.combine:
+            secrets = [{"name": spec.name, "example": "".join(secret["example"] for secret in self.secrets[:spec.combine])}]
+        names = tuple(reversed(spec.names)) if spec.reverse_names else spec.names
+        suffixes = spec.suffixes or self.suffix_list
+        # Parsing the chains up front rejects a misspelled one before any file is written.
+        encodings = [(encoding, encoding_chain(encoding).label) for encoding in spec.encodings] or [(None, "")]
+        if len(encodings) > 1 and "{encoding}" not in spec.file_name:
+            raise ValueError(f"Scenario '{spec.name}' has several encodings, so its file_name needs an {{encoding}} field")
+
+        for index, secret in enumerate(secrets):
+            if names and index >= len(names):
+                return
+            if spec.content is not None:
+                secret = {**secret, "example": spec.content.format(example=secret["example"])}
+            for suffix in suffixes:
+                for encoding, label in encodings:
+                    if suffix == FileExtensionEnum.doc.suffix:
+                        file_name = secret["name"] + (f".{label}" if label else "") + suffix
+                    else:
+                        file_name = spec.file_name.format(secret_name=secret["name"], suffix=suffix, extension=suffix[1:],
+                                                          index=index, name=names[index] if names else "", encoding=label)
+                    yield FileSpec(folder_path=spec.folder_path, file_name=file_name, suffix=suffix, secret=secret,
+                                   is_hidden=spec.is_hidden, recycle_bin=spec.recycle_bin, encoding=encoding)
+
+    def plan_all(self, specs):
+        """Plans several scenarios, dropping files that a later scenario overwrites anyway."""
+        planned = {}
+        for spec in specs:
+            for file_spec in self.plan(spec):
+                full_path = os.path.join(file_spec.folder_path, file_spec.file_name)
+                planned.pop(full_path, None)
+                planned[full_path] = file_spec
+        return [file_spec for file_spec in planned.values() if self.owns(file_spec)]
+
+    def owns(self, file_spec) -> bool:
+        """Whether this engine's shard writes the file; always true without sharding."""
+        return self.shard is None or self.shard.owns(self.output_path(file_spec))
+
+    def output_path(self, file_spec) -> str:
+        """Returns the path Tools writes the file to."""
+        if file_spec.suffix == FileExtensionEnum.doc.suffix:
+            full_path = file_spec.folder_path + file_spec.file_name
+        else:
+            full_path = os.path.join(file_spec.folder_path, file_spec.file_name)
+        return self.tools.platform.hidden_path(full_path) if file_spec.is_hidden else full_path
+
+    def write(self, file_spec) -> int:
+        """Writes a single file and returns its size in bytes; up-to-date files are skipped in incremental runs."""
+        writer = self._write_encoded if file_spec.encoding is not None else self.writers[file_spec.suffix]
+        if self.state is None:
+            return writer(file_spec)
+
+        full_path = self.output_path(file_spec)
+        input_hash = file_input_hash(file_spec)
+        size = self.state.current_size(full_path, input_hash, recycle_bin=file_spec.recycle_bin,
+                                       filesystem=self.tools.writer.filesystem)
+        if size is not None:
+            if instrumentation.enabled:
+                instrumentation.count("files_skipped")
+            return size
+        size = writer(file_spec)
+        self.state.record(full_path, input_hash, size)
+        return size
+
+    def is_current(self, spec) -> bool:
+        """Whether every file of the scenario is on disk with the inputs and size recorded in the state."""
+        if spec.hidden_folder:
+            # Same folder _with_hidden_folder writes into, without creating it.
+            spec = dataclasses.replace(spec, folder_path=self.tools.platform.hidden_path(spec.folder_path))
+        for file_spec in self.plan_all([spec]):
+            size = self.state.current_size(self.output_path(file_spec), file_input_hash(file_spec),
+                                           recycle_bin=file_spec.recycle_bin, filesystem=self.tools.writer.filesystem)
+            if size is None:
+                return False
+        return True
+
+    def _with_hidden_folder(self, spec):
+        """Creates the hidden folder of the scenario and returns the spec writing into it."""
+        if not spec.hidden_folder:
+            return spec
+        if self.shard is None or self.shard.owns(spec.folder_path):
+            folder_path = self.tools.create_hidden_directory(spec.folder_path)
+        else:
+            # The owning shard creates and hides the folder; files still go in under its hidden name.
+            folder_path = self.tools.platform.hidden_path(spec.folder_path)
+        return dataclasses.replace(spec, folder_path=folder_path)
+
+    def run(self, spec) -> int:
+        """Runs a single scenario and returns the number of bytes written."""
+        spec = self._with_hidden_folder(spec)
+        # A path planned more than once is written once, with its last content, as on disk.
+        written = sum(self.write(file_spec) for file_spec in self.plan_all([spec]))
+        # Files to hide or trash are handled in one batch once the scenario has written them.
+        self.tools.flush_file_ops()
+        return written
+
+    def run_all(self, specs, workers=1) -> int:
+        """Plans and dedupes several scenarios, then writes the files, in parallel when workers > 1."""
+        specs = [self._with_hidden_folder(spec) for spec in specs]
+        file_specs = self.plan_all(specs)
+        self.tools.writer.precreate_folders(file_spec.folder_path for file_spec in file_specs)
+        logging.info(f"Writing {len(file_specs)} planned files from {len(specs)} scenarios")
+
+        if workers <= 1:
+            written = sum(self.write(file_spec) for file_spec in file_specs)
+        else:
+            # Planned paths are unique, so the files can be written in any order.
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scenario-engine") as pool:
+                written = sum(pool.map(self.write, file_specs))
+        self.tools.flush_file_ops()
+        return written
+
+    def _write_json(self, file_spec) -> int:
+        data = self.tools.renderer.render(file_spec.suffix, file_spec.secret)
+        return self.tools.create_json_file_windows(folder_path=file_spec.folder_path, file_name=file_spec.file_name, data=data,
+                                                   recycle_bin=file_spec.recycle_bin, is_hidden=file_spec.is_hidden,
+                                                   secret=file_spec.secret)
+
+    def _write_csv(self, file_spec) -> int:
+        data = self.tools.renderer.render(file_spec.suffix, file_spec.secret)
+        return self.tools.create_csv_file_windows(folder_path=file_spec.folder_path, file_name=file_spec.file_name, data=data,
+                                                  recycle_bin=file_spec.recycle_bin, is_hidden=file_spec.is_hidden,
+                                                  secret=file_spec.secret)
+
+    def _write_doc(self, file_spec) -> int:
+        return self.tools.create_doc_file(folder_path=file_spec.folder_path, secret=file_spec.secret, file_name=file_spec.file_name,
+                                          is_hidden=file_spec.is_hidden, recycle_bin=file_spec.recycle_bin)
+
+    def _write_text(self, file_spec) -> int:
+        text = self.tools.renderer.render(file_spec.suffix, file_spec.secret)
+        if file_spec.is_hidden:
+            return self.tools.create_hidden_file_windows(folder_path=file_spec.folder_path, file_name=file_spec.file_name,
+                                                         text=text, recycle_bin=file_spec.recycle_bin, secret=file_spec.secret)
+        return self.tools.create_file_with_text(folder_path=file_spec.folder_path, file_name=file_spec.file_name,
+                                                text=text, recycle_bin=file_spec.recycle_bin, secret=file_spec.secret)
+
+    def _write_encoded(self, file_spec) -> int:
+        return self.tools.create_encoded_file(folder_path=file_spec.folder_path, file_name=file_spec.file_name,
+                                              suffix=file_spec.suffix, secret=file_spec.secret, encoding=file_spec.encoding,
+                                              is_hidden=file_spec.is_hidden, recycle_bin=file_spec.recycle_bin)
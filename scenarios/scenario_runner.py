@@ -0,0 +1,158 @@
+import inspect
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scenarios.base_scenarios import BaseScenarios
+from scenarios.scenario_spec import load_scenario_specs
+from utils.incremental import GenerationState
+from utils.instrumentation import instrumentation
+from utils.logger import setup_logger
+from utils.manifest import create_manifest, merge_manifests
+from utils.tools import Tools
+from utils.writers import create_writer
+
+# Method name prefixes that mark a BaseScenarios method as a runnable scenario.
+SCENARIO_PREFIXES = ("generate_", "hidden_", "recycle_bin_")
+
+# Number of striped locks shared between worker processes.
+PROCESS_LOCK_STRIPES = 64
+
+# Scenarios instance owned by each worker process of the process pool.
+_process_scenarios = None
+
+
+def _part_manifest_path(manifest_path, pid):
+    root, extension = os.path.splitext(manifest_path)
+    return f"{root}.part-{pid}{extension}"
+
+
+def _init_process_worker(locks, writer_name, writer_options, manifest_path, instrumented=False, state_path=None,
+                         shard=None, log_level=logging.DEBUG, log_every=1):
+    """Initializes a worker process with the shared path locks and its own scenarios instance."""
+    global _process_scenarios
+    # Workers started with spawn do not inherit the parent's logging setup.
+    setup_logger(log_level)
+    Tools.set_path_locks(locks)
+    instrumentation.configure(enabled=instrumented, log_every=log_every)
+    # Every worker records into its own partial manifest; the runner merges them at the end.
+    manifest = create_manifest(_part_manifest_path(manifest_path, os.getpid())) if manifest_path else None
+    # The state file is shared; SQLite serializes the writes of the workers.
+    state = GenerationState(state_path) if state_path else None
+    _process_scenarios = BaseScenarios(writer=create_writer(writer_name, **writer_options), manifest=manifest, state=state,
+                                       shard=shard)
+
+
+def _run_scenario_in_process(scenario_name):
+    """Runs a single scenario by name inside a worker process; returns the pid and the metrics it recorded."""
+    try:
+        _process_scenarios.run_scenario(scenario_name)
+    finally:
+        # Worker processes have no shutdown hook, so every scenario leaves its files on disk.
+        _process_scenarios.tools.writer.flush()
+        if _process_scenarios.tools.manifest is not None:
+            _process_scenarios.tools.manifest.flush()
+        if _process_scenarios.state is not None:
+            _process_scenarios.state.flush()
+    return os.getpid(), instrumentation.drain() if instrumentation.enabled else None
+
+
+class ScenarioRunner:
+    """Runs BaseScenarios scenarios concurrently on a thread or process pool."""
+
+    def __init__(self, workers=1, executor="thread", writer_name="direct", writer_options=None, manifest_path=None,
+                 state_path=None, shard=None):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor must be 'thread' or 'process', got '{executor}'")
+        if executor == "process" and writer_name == "archive":
+            raise ValueError("The archive writer needs a single writer; use the thread executor")
+        self.workers = workers
+        self.executor = executor
+        self.writer_name = writer_name
+        self.writer_options = writer_options or {}
+        self.manifest_path = manifest_path
+        # State file of an incremental run; scenarios and files that are up to date are skipped.
+        self.state_path = state_path
+        # Optional Shard; only its part of the corpus is written (see utils.sharding).
+        self.shard = shard
+
+    @staticmethod
+    def discover_scenarios():
+        """Returns the names of all scenario methods that take no arguments, then of spec-only scenarios."""
+        names = []
+        for name, member in vars(BaseScenarios).items():
+            if not name.startswith(SCENARIO_PREFIXES) or not callable(member):
+                continue
+            # Scenarios taking arguments (e.g. scale mode targets) are not part of the default corpus.
+            if len(inspect.signature(member).parameters) > 1:
+                continue
+            names.append(name)
+        # Scenarios defined only in the spec file need no method of their own.
+        names.extend(name for name in load_scenario_specs() if name.startswith(SCENARIO_PREFIXES) and name not in names)
+        return names
+
+    def run(self, scenario_names=None):
+        """Runs the given scenarios (all discovered ones by default) and returns the names that failed."""
+        scenario_names = list(scenario_names or self.discover_scenarios())
+        shard_note = f" as shard {self.shard}" if self.shard is not None else ""
+        logging.info(f"Running {len(scenario_names)} scenarios on {self.workers} {self.executor} worker(s){shard_note}")
+
+        if self.executor == "process":
+            # Loaded only for process pools; plain runs start faster without them.
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            locks = [multiprocessing.Lock() for _ in range(PROCESS_LOCK_STRIPES)]
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process_worker,
+                                       initargs=(locks, self.writer_name, self.writer_options, self.manifest_path,
+                                                 instrumentation.enabled, self.state_path, self.shard,
+                                                 logging.getLogger().level, instrumentation.log_every))
+            submit = lambda name: pool.submit(_run_scenario_in_process, name)
+            writer = manifest = state = None
+        else:
+            writer = create_writer(self.writer_name, **self.writer_options)
+            manifest = None
+            if self.manifest_path:
+                # Incremental runs keep the entries of the files they skip.
+                manifest = create_manifest(self.manifest_path, keep_existing=self.state_path is not None)
+            state = GenerationState(self.state_path) if self.state_path else None
+            scenarios = BaseScenarios(writer=writer, manifest=manifest, state=state, shard=self.shard)
+            pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scenario")
+            submit = lambda name: pool.submit(scenarios.run_scenario, name)
+
+        failed = []
+        worker_pids = set()
+        with pool:
+            futures = {submit(name): name for name in scenario_names}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                    if self.executor == "process":
+                        pid, metrics = result
+                        worker_pids.add(pid)
+                        if metrics is not None:
+                            instrumentation.merge(metrics)
+                except Exception as e:
+                    # A failing scenario must not stop the rest of the corpus from being generated.
+                    logging.error(f"Scenario '{name}' failed: {e}")
+                    failed.append(name)
+        if writer is not None:
+            writer.close()
+        if manifest is not None:
+            manifest.close()
+        if state is not None:
+            state.close()
+        if self.executor == "process" and self.manifest_path:
+            self._merge_part_manifests(worker_pids)
+        return failed
+
+    def _merge_part_manifests(self, worker_pids):
+        part_paths = [_part_manifest_path(self.manifest_path, pid) for pid in sorted(worker_pids)]
+        part_paths = [path for path in part_paths if os.path.exists(path)]
+        # Workers only record the files they write; the merged manifest keeps the entries of skipped files.
+        merge_manifests(part_paths, self.manifest_path, keep_existing=self.state_path is not None)
+        for path in part_paths:
+            os.remove(path)
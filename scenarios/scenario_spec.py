@@ -0,0 +1,56 @@
+import json
+import os
+from dataclasses import dataclass, fields
+from typing import Optional
+
+# Scenario definitions shipped with the project.
+DEFAULT_SCENARIOS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "scenarios.json")
+
+
+@dataclass(frozen=True)
+class ScenarioSpec:
+    """Declarative description of a scenario, run by the ScenarioEngine.
+
+    file_name is a format template with the fields secret_name, suffix, extension (suffix without the dot),
+    index, name (the entry of names for the current secret) and encoding (the label of the encoding chain).
+    Documents are always named after the secret.
+    """
+    name: str
+    folder_path: str
+    file_name: str = "{secret_name}{suffix}"
+    # Suffixes to generate; the default suffixes (all but the rich documents) when empty.
+    suffixes: tuple = ()
+    # Maximum number of secrets to use; all of them when None.
+    limit: Optional[int] = None
+    # Names used by the file_name template, one per secret; the scenario stops when they run out.
+    names: tuple = ()
+    reverse_names: bool = False
+    # Template wrapped around every secret, with the secret in the {example} field.
+    content: Optional[str] = None
+    # Join the examples of the first N secrets into a single secret.
+    combine: Optional[int] = None
+    is_hidden: bool = False
+    recycle_bin: bool = False
+    hidden_folder: bool = False
+    # Encoding chains (see utils.secret_encodings); every file is written once per chain.
+    encodings: tuple = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a spec from a JSON object, rejecting unknown keys."""
+        known = {spec_field.name for spec_field in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown keys {sorted(unknown)} in scenario '{data.get('name')}'")
+        values = dict(data)
+        for key in ("suffixes", "names", "encodings"):
+            if key in values:
+                values[key] = tuple(values[key])
+        return cls(**values)
+
+
+def load_scenario_specs(file_path=DEFAULT_SCENARIOS_PATH):
+    """Loads the scenario specs from a JSON file and returns them by name, in file order."""
+    with open(file_path, encoding="utf-8") as json_file:
+        specs = [ScenarioSpec.from_dict(data) for data in json.load(json_file)]
+    return {spec.name: spec for spec in specs}
@@ -0,0 +1,86 @@
+"""Runs a sharded generation on one machine, one main.py process per shard, then merges their manifests.
+
+Each shard writes its own partial manifest (and incremental state), exactly as separate machines would:
+
+    python -m scenarios.shard_launcher --shards 4 --manifest manifest.jsonl -- --workers 8
+    python -m scenarios.shard_launcher --merge manifest.jsonl manifest.shard-1-of-4.jsonl manifest.shard-2-of-4.jsonl ...
+
+Arguments after "--" are passed to every main.py process. Shards run in the current working directory.
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+
+from utils.logger import setup_logger
+from utils.manifest import merge_manifests
+from utils.sharding import Shard
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def shard_file_path(file_path, shard) -> str:
+    """Path of the shard's own copy of a manifest or state file, e.g. manifest.shard-2-of-4.jsonl."""
+    root, extension = os.path.splitext(file_path)
+    return f"{root}.shard-{shard.index + 1}-of-{shard.count}{extension}"
+
+
+def launch_shards(count, main_args=(), manifest_path=None, state_path=None, log_level=None):
+    """Runs every shard in its own process, merges the partial manifests and returns the number of entries."""
+    shards = [Shard(index, count) for index in range(count)]
+    processes = []
+    for shard in shards:
+        command = [sys.executable, MAIN_PATH, "--shard", str(shard)]
+        if log_level:
+            # Given first, so a --log-level in main_args still wins.
+            command += ["--log-level", log_level]
+        command += main_args
+        if manifest_path:
+            command += ["--manifest", shard_file_path(manifest_path, shard)]
+        if state_path:
+            command += ["--incremental", shard_file_path(state_path, shard)]
+        processes.append(subprocess.Popen(command))
+    logging.info(f"Launched {count} shards")
+
+    failed = [str(shard) for shard, process in zip(shards, processes) if process.wait() != 0]
+    if failed:
+        raise RuntimeError(f"Shards {', '.join(failed)} failed")
+    if not manifest_path:
+        return 0
+    part_paths = [shard_file_path(manifest_path, shard) for shard in shards]
+    entries = merge_manifests(part_paths, manifest_path)
+    # Incremental shards keep their manifests, which hold the entries of the files their next run skips.
+    if not state_path:
+        for path in part_paths:
+            os.remove(path)
+    logging.info(f"Merged {len(part_paths)} shard manifests into '{manifest_path}' ({entries} entries)")
+    return entries
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a sharded generation locally, or merge shard manifests.")
+    parser.add_argument("--shards", type=int, default=None, help="Number of shards to run, one process each.")
+    parser.add_argument("--manifest", default=None, help="Merged manifest to write (.jsonl, or .db/.sqlite).")
+    parser.add_argument("--incremental", default=None, metavar="STATE_FILE",
+                        help="Incremental state file; every shard keeps its own copy next to it.")
+    parser.add_argument("--merge", nargs="+", default=None, metavar=("OUTPUT", "PART"),
+                        help="Only merge the given shard manifests (e.g. copied from several machines) into OUTPUT.")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR"), default="DEBUG",
+                        help="Lowest level of the log records shown, by the launcher and every shard.")
+    parser.add_argument("main_args", nargs=argparse.REMAINDER, help="Arguments passed to main.py after --.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logger(args.log_level)
+    if args.merge:
+        output_path, *part_paths = args.merge
+        logging.info(f"Merged {merge_manifests(part_paths, output_path)} entries into '{output_path}'")
+    elif args.shards:
+        main_args = args.main_args[1:] if args.main_args[:1] == ["--"] else args.main_args
+        launch_shards(args.shards, main_args, manifest_path=args.manifest, state_path=args.incremental,
+                      log_level=args.log_level)
+    else:
+        raise SystemExit("Either --shards N or --merge OUTPUT PART... is required")
@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from tests.helpers import GeneratedFilesTestCase
+from utils.writers import create_writer
+
+
+class ContentStoreTest(GeneratedFilesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.writer = create_writer("direct", dedup="hardlink")
+        self.addCleanup(self.writer.close)
+        self.store = self.writer.content_store
+
+    def write(self, file_name, data):
+        self.store.write(self.writer, os.path.join(self.root, file_name), data)
+
+    def read(self, file_name):
+        with open(os.path.join(self.root, file_name), "rb") as file:
+            return file.read()
+
+    def test_duplicate_bodies_are_linked(self):
+        self.write("a.txt", b"one")
+        self.write("b.txt", b"one")
+        self.assertEqual(os.stat("a.txt").st_ino, os.stat("b.txt").st_ino)
+        self.assertEqual((self.store.files_written, self.store.files_linked), (1, 1))
+
+    def test_rewritten_source_is_not_linked_to(self):
+        self.write("a.txt", b"one")
+        self.write("a.txt", b"two")
+        self.write("b.txt", b"one")
+        self.assertEqual(self.read("a.txt"), b"two")
+        self.assertEqual(self.read("b.txt"), b"one")
+        self.write("c.txt", b"two")
+        self.assertEqual(self.read("c.txt"), b"two")
+
+    def test_sources_are_bounded(self):
+        self.store.max_sources = 4
+        for index in range(20):
+            self.write(f"{index}.txt", str(index).encode())
+        self.assertEqual(len(self.store._sources), 4)
+        # A forgotten body is written again instead of linked.
+        self.write("again.txt", b"0")
+        self.assertNotEqual(os.stat("0.txt").st_ino, os.stat("again.txt").st_ino)
+        self.assertEqual(self.read("again.txt"), b"0")
+
+
+if __name__ == "__main__":
+    unittest.main()
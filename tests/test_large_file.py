@@ -0,0 +1,61 @@
+import json
+import os
+import unittest
+
+from scenarios.base_scenarios import BaseScenarios
+from tests.helpers import SECRETS, GeneratedFilesTestCase
+from utils.large_file import DEFAULT_CHUNK_SIZE, PLACEMENTS, LargeFileGenerator, default_placements
+
+CHUNK_SIZE = 256
+SIZE = 4096
+
+
+class LargeFileOffsetsTest(GeneratedFilesTestCase):
+
+    def assert_secrets_at_offsets(self, path, manifest):
+        with open(path, "rb") as file:
+            content = file.read()
+        self.assertEqual(len(content), manifest["size"])
+        examples = {secret["name"]: secret["example"].encode("utf-8") for secret in SECRETS}
+        for item in manifest["secrets"]:
+            self.assertEqual(content[item["offset"]:item["offset"] + item["length"]], examples[item["name"]], item)
+
+    def test_every_placement_is_recorded_at_its_offset(self):
+        for fill in ("stream", "sparse", "template"):
+            with self.subTest(fill=fill):
+                path = os.path.join(self.root, f"large_{fill}.txt")
+                manifest = LargeFileGenerator(chunk_size=CHUNK_SIZE, fill=fill).write(path, SIZE, SECRETS,
+                                                                                       list(PLACEMENTS) + [1000, -100])
+                self.assertEqual(len(manifest["secrets"]), len(PLACEMENTS) + 2)
+                self.assert_secrets_at_offsets(path, manifest)
+                offsets = {item["placement"]: item["offset"] for item in manifest["secrets"]}
+                self.assertEqual(offsets["start"], 0)
+                self.assertEqual(offsets["1000"], 1000)
+                self.assertEqual(offsets["-100"], SIZE - 100)
+                end = next(item for item in manifest["secrets"] if item["placement"] == "end")
+                self.assertEqual(end["offset"] + end["length"], SIZE)
+                boundary = next(item for item in manifest["secrets"] if item["placement"] == "chunk_boundary")
+                self.assertLess(boundary["offset"], CHUNK_SIZE)
+                self.assertGreater(boundary["offset"] + boundary["length"], CHUNK_SIZE)
+                with open(path + ".manifest.json", encoding="utf-8") as sidecar:
+                    self.assertEqual(json.load(sidecar), manifest)
+
+    def test_overlapping_or_oversized_placements_are_rejected(self):
+        generator = LargeFileGenerator(chunk_size=CHUNK_SIZE)
+        with self.assertRaises(ValueError):
+            generator.plan(SIZE, SECRETS, [10, 12])
+        with self.assertRaises(ValueError):
+            generator.plan(SIZE, SECRETS, [SIZE - 1])
+        with self.assertRaises(ValueError):
+            generator.plan(CHUNK_SIZE, SECRETS, ["chunk_boundary"])
+
+    def test_small_files_leave_out_chunk_boundary_by_default(self):
+        self.assertNotIn("chunk_boundary", default_placements(2 * CHUNK_SIZE - 1, CHUNK_SIZE))
+        self.assertEqual(default_placements(2 * CHUNK_SIZE, CHUNK_SIZE), PLACEMENTS)
+        self.assertNotIn("chunk_boundary", default_placements(DEFAULT_CHUNK_SIZE))
+        manifests = BaseScenarios(secrets_path=self.secrets_path).generate_large_files(sizes=(1000,))
+        self.assertEqual([item["placement"] for item in manifests[0]["secrets"]], ["start", "middle", "end"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from config.file_extension_enum import FileExtensionHandler
+from scenarios.base_scenarios import BaseScenarios
+from tests.helpers import SECRETS, GeneratedFilesTestCase, snapshot
+from utils.tools import Tools
+
+MID_TEXT = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor incididunt ut labore et dolore "
+            "magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco {example} laboris nisi ut aliquip ex "
+            "ea commodo consequat. Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat "
+            "nulla pariatur. Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit "
+            "anim id est laborum.")
+SPECIAL_CHARS = ["!@#$%^^&()", "asdasd!@#!@#!", "asdad@!#^&&(asdad", "adsas.asda.!@#!@.sad", "🍕!@#asd@!#", "🌍"]
+
+
+def write_legacy_file(tools, folder_path, file_name, suffix, secret):
+    """The suffix dispatch of the scenario methods written before config/scenarios.json."""
+    secret_text = tools.generate_secret_text(suffix=suffix, secret_obj=secret)
+    if "json" in suffix:
+        tools.create_json_file_windows(folder_path=folder_path, data=secret_text, file_name=file_name)
+    elif "csv" in suffix:
+        tools.create_csv_file_windows(folder_path=folder_path, data=secret_text, file_name=file_name)
+    elif "docx" in suffix:
+        tools.create_doc_file(folder_path=folder_path, secret=secret)
+    else:
+        tools.create_file_with_text(folder_path=folder_path, file_name=file_name, text=secret_text)
+
+
+def run_legacy_scenarios(tools, secrets):
+    """Writes the files of the scenarios as the old hand-written methods did."""
+    suffixes = FileExtensionHandler().return_enum_list
+    for secret in secrets:
+        tools.create_file_with_text(folder_path="generated_files\\text_lower\\", file_name=secret["name"] + ".txt",
+                                    text=secret["example"])
+    for secret in secrets[:10]:
+        tools.create_file_with_text(folder_path="generated_files\\text_upper\\", file_name=secret["name"] + ".TXT",
+                                    text=secret["example"])
+    for index, secret in enumerate(secrets):
+        for suffix in suffixes:
+            if index < 4:
+                write_legacy_file(tools, "generated_files\\generic_five\\", secret["name"] + suffix, suffix, secret)
+                write_legacy_file(tools, "generated_files\\hebrew\\", "יונתן" + suffix, suffix, secret)
+            if index < 1:
+                write_legacy_file(tools, "generated_files\\numeric\\", f"{index} + {suffix}", suffix, secret)
+            if index < 6:
+                write_legacy_file(tools, "generated_files\\special_chars\\", SPECIAL_CHARS[index] + suffix, suffix, secret)
+    tools.create_file_with_text(folder_path="generated_files\\space\\", file_name=secrets[0]["name"] + ".txt",
+                                text=MID_TEXT.format(example=secrets[0]["example"]))
+    combined = "".join(secret["example"] for secret in secrets[:5])
+    for suffix in (".txt", ".py", ".bat", ".cs", ".pem", ".TXT"):
+        tools.create_file_with_text(folder_path="generated_files\\several_secrets\\", file_name=suffix[1:] + suffix,
+                                    text=tools.generate_secret_text_formatted(suffix=suffix, secrets=combined))
+
+
+class ScenarioSpecEquivalenceTest(GeneratedFilesTestCase):
+    SCENARIOS = ("generate_all_single_examples_txt_lower_files", "generate_ten_single_examples_txt_upper_files",
+                 "generate_five_single_examples", "generate_numeric_name_files", "generate_hebrew_letters",
+                 "generate_special_chars_single_examples", "generate_file_with_secret_in_mid_text_spaces",
+                 "several_secrets_in_one_file")
+
+    def test_specs_write_the_files_of_the_legacy_methods(self):
+        legacy_root = self.working_directory("legacy")
+        run_legacy_scenarios(Tools(), SECRETS)
+
+        spec_root = self.working_directory("specs")
+        scenarios = BaseScenarios(secrets_path=self.secrets_path)
+        for name in self.SCENARIOS:
+            scenarios.run_scenario(name)
+
+        # Documents carry their creation time, so only their names are compared.
+        legacy, specs = snapshot(legacy_root), snapshot(spec_root)
+        self.assertEqual(sorted(legacy), sorted(specs))
+        self.assertEqual({path: data for path, data in legacy.items() if not path.endswith(".docx")},
+                         {path: data for path, data in specs.items() if not path.endswith(".docx")})
+
+    def test_a_path_planned_twice_is_written_once_with_its_last_content(self):
+        scenarios = BaseScenarios(secrets_path=self.secrets_path)
+        spec = scenarios.scenario_specs["generate_hebrew_letters"]
+        file_specs = scenarios.engine.plan_all([spec])
+
+        paths = [scenarios.engine.output_path(file_spec) for file_spec in file_specs]
+        self.assertEqual(len(paths), len(set(paths)))
+        self.assertEqual({file_spec.secret["name"] for file_spec in file_specs if file_spec.suffix == ".txt"},
+                         {SECRETS[3]["name"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
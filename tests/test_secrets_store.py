@@ -0,0 +1,42 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from utils.secrets_store import SecretsStore, iter_json_array_spans
+
+
+class JsonArraySpansTest(unittest.TestCase):
+
+    def test_brackets_inside_strings_are_skipped(self):
+        buffer = b'[{"name": "a", "example": "x}]{[\\"y"}, {"name": "b"}]'
+        spans = list(iter_json_array_spans(buffer))
+        self.assertEqual([json.loads(buffer[offset:offset + length])["name"] for offset, length in spans], ["a", "b"])
+
+    def test_long_bracket_free_tail_is_linear(self):
+        # A nested quantifier used to backtrack exponentially over text after the last bracket.
+        buffer = b'[{"name": "a", "example": "secret"}]\n' + b" " * 4096 + b"trailing text " * 1024
+        start = time.perf_counter()
+        spans = list(iter_json_array_spans(buffer))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(len(spans), 1)
+
+
+class SecretsStoreTest(unittest.TestCase):
+
+    def test_catalog_with_trailing_whitespace_opens_quickly(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "catalog.json")
+            with open(path, "w", encoding="utf-8") as catalog:
+                catalog.write('[{"name": "aws_key", "type": "aws", "example": "AKIA"}]\n' + " " * 64)
+            start = time.perf_counter()
+            with SecretsStore(path) as store:
+                self.assertLess(time.perf_counter() - start, 1.0)
+                self.assertEqual(len(store), 1)
+                self.assertEqual(store.get("aws_key")["example"], "AKIA")
+                self.assertEqual([entry["name"] for entry in store.by_type("aws")], ["aws_key"])
+
+
+if __name__ == "__main__":
+    unittest.main()
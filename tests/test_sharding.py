@@ -0,0 +1,45 @@
+import unittest
+
+from scenarios.base_scenarios import BaseScenarios
+from tests.helpers import GeneratedFilesTestCase, snapshot
+from utils.sharding import Shard
+
+SHARDS = 3
+
+
+class ShardingTest(GeneratedFilesTestCase):
+
+    def run_scenarios(self, folder, shard=None):
+        root = self.working_directory(folder)
+        scenarios = BaseScenarios(secrets_path=self.secrets_path, shard=shard)
+        # Recycle bin scenarios are left out, since they move files out of the working directory.
+        names = [spec.name for spec in scenarios.scenario_specs.values() if not spec.recycle_bin]
+        for name in names:
+            scenarios.run_scenario(name)
+        return snapshot(root, skip_suffixes=(".docx",)), set(snapshot(root))
+
+    def test_union_of_shards_equals_a_single_run(self):
+        single_files, single_paths = self.run_scenarios("single")
+
+        union_files, union_paths = {}, set()
+        for index in range(SHARDS):
+            files, paths = self.run_scenarios(f"shard-{index}", Shard(index, SHARDS))
+            self.assertTrue(files)
+            # Every path is written by exactly one shard.
+            self.assertFalse(union_paths & paths)
+            union_files.update(files)
+            union_paths |= paths
+
+        self.assertEqual(union_paths, single_paths)
+        self.assertEqual(union_files, single_files)
+
+    def test_parse_is_one_based(self):
+        self.assertEqual(Shard.parse("1/4"), Shard(0, 4))
+        self.assertEqual(str(Shard(3, 4)), "4/4")
+        for value in ("0/4", "5/4", "x/4", "1"):
+            with self.assertRaises(ValueError):
+                Shard.parse(value)
+
+
+if __name__ == "__main__":
+    unittest.main()
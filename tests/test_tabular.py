@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+import os
+import unittest
+
+from tests.helpers import SECRETS, GeneratedFilesTestCase
+from utils.tabular import TabularGenerator
+
+ROWS = 500
+COLUMNS = 8
+
+
+class TabularOffsetsTest(GeneratedFilesTestCase):
+
+    def write_table(self, file_format):
+        path = os.path.join(self.root, f"table.{file_format}")
+        # Every secret is placed, including the one CSV has to quote and JSON has to escape.
+        manifest = TabularGenerator(file_format=file_format, columns=COLUMNS, chunk_size=1024).write(
+            path, ROWS, SECRETS, secret_every=ROWS // len(SECRETS) - 1)
+        with open(path, "rb") as file:
+            content = file.read()
+        self.assertEqual(len(content), manifest["size"])
+        self.assertGreaterEqual(len(manifest["secrets"]), len(SECRETS))
+        return content, manifest
+
+    def assert_values_at_offsets(self, content, manifest, encode):
+        examples = {secret["name"]: secret["example"] for secret in SECRETS}
+        for item in manifest["secrets"]:
+            self.assertEqual(content[item["offset"]:item["offset"] + item["length"]], encode(examples[item["name"]]), item)
+
+    def test_csv_offsets_and_cells(self):
+        content, manifest = self.write_table("csv")
+        # The offset points at the value inside the quotes, where it is stored with doubled quotes.
+        self.assert_values_at_offsets(content, manifest, lambda value: value.replace('"', '""').encode("utf-8"))
+        rows = list(csv.DictReader(io.StringIO(content.decode("utf-8"))))
+        self.assertEqual(len(rows), ROWS)
+        examples = {secret["name"]: secret["example"] for secret in SECRETS}
+        for item in manifest["secrets"]:
+            self.assertEqual(rows[item["row"]][item["column"]], examples[item["name"]])
+
+    def test_json_and_jsonl_offsets_and_cells(self):
+        examples = {secret["name"]: secret["example"] for secret in SECRETS}
+        for file_format in ("json", "jsonl"):
+            with self.subTest(file_format=file_format):
+                content, manifest = self.write_table(file_format)
+                self.assert_values_at_offsets(content, manifest,
+                                              lambda value: json.dumps(value, ensure_ascii=False)[1:-1].encode("utf-8"))
+                if file_format == "json":
+                    # The rows end with a comma, so the array is parsed row by row.
+                    rows = [json.loads(line.rstrip(b",")) for line in content.splitlines()[1:-1]]
+                else:
+                    rows = [json.loads(line) for line in content.splitlines()]
+                self.assertEqual(len(rows), ROWS)
+                for item in manifest["secrets"]:
+                    self.assertEqual(rows[item["row"]][item["column"]], examples[item["name"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
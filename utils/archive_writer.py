@@ -0,0 +1,183 @@
+import io
+import posixpath
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+from utils.writers import BaseWriter
+
+# Fixed timestamp (1980-01-01) of every archive member, so identical corpora give identical archives.
+ARCHIVE_TIMESTAMP = 315532800
+
+# Archive format -> tarfile stream mode; zip is handled by zipfile.
+TAR_MODES = {
+    "tar": "w|",
+    "tar.gz": "w|gz",
+    "tar.bz2": "w|bz2",
+    "tar.xz": "w|xz",
+}
+ARCHIVE_FORMATS = ("zip",) + tuple(TAR_MODES)
+
+# Archive path endings recognised by archive_format_for_path, longest first.
+ARCHIVE_SUFFIXES = (
+    (".tar.gz", "tar.gz"), (".tgz", "tar.gz"), (".tar.bz2", "tar.bz2"), (".tar.xz", "tar.xz"), (".txz", "tar.xz"),
+    (".tar", "tar"), (".zip", "zip"),
+)
+
+
+def archive_format_for_path(archive_path) -> str:
+    """Returns the archive format matching the file name of the archive."""
+    lowered = archive_path.lower()
+    for suffix, archive_format in ARCHIVE_SUFFIXES:
+        if lowered.endswith(suffix):
+            return archive_format
+    raise ValueError(f"Cannot tell the archive format of '{archive_path}', expected one of {ARCHIVE_FORMATS}")
+
+
+def member_name(full_path) -> str:
+    """Turns a generated path (with Windows or POSIX separators) into a relative archive member name."""
+    name = posixpath.normpath(full_path.replace("\\", "/"))
+    # Absolute paths and parent references must not escape the archive root.
+    return "/".join(part for part in name.split("/") if part not in ("", ".", ".."))
+
+
+class _Archive:
+    """Sequential writer of one zip or tar stream."""
+
+    def __init__(self, fileobj, archive_format, compress_level=6):
+        self.archive_format = archive_format
+        if archive_format == "zip":
+            self._zip = zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compress_level)
+            self._tar = None
+        else:
+            if archive_format not in TAR_MODES:
+                raise ValueError(f"Unknown archive format '{archive_format}', expected one of {ARCHIVE_FORMATS}")
+            # Stream modes write the tar in one pass without seeking back.
+            self._tar = tarfile.open(fileobj=fileobj, mode=TAR_MODES[archive_format])
+            self._zip = None
+
+    def add(self, name, data) -> None:
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=time.gmtime(ARCHIVE_TIMESTAMP)[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = ARCHIVE_TIMESTAMP
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+
+    def add_file(self, name, fileobj, size) -> None:
+        """Copies a member from an open file in bounded chunks."""
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=time.gmtime(ARCHIVE_TIMESTAMP)[:6])
+            # Nested archives are already compressed.
+            info.compress_type = zipfile.ZIP_STORED
+            info.external_attr = 0o644 << 16
+            with self._zip.open(info, "w") as member:
+                while True:
+                    chunk = fileobj.read(1 << 20)
+                    if not chunk:
+                        break
+                    member.write(chunk)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = ARCHIVE_TIMESTAMP
+            info.mode = 0o644
+            self._tar.addfile(info, fileobj)
+
+    def close(self) -> None:
+        (self._zip or self._tar).close()
+
+
+class ArchiveWriter(BaseWriter):
+    """Streams every generated file into a zip or tar(.gz/.bz2/.xz) archive instead of the filesystem.
+
+    Members are written in one pass as they arrive, so memory stays bounded by the largest file. With
+    nested_format, the files of each folder go into an inner archive of that format, which is spooled to a
+    temporary file and stored in the outer archive; scanners then have to open archives in archives.
+
+    At most max_open_folders inner archives are open at once: the least recently written one is stored when
+    another folder needs a spool, and a folder written to again afterwards gets another part, e.g.
+    "folder.part2.zip", so memory and file descriptors stay bounded whatever the number of folders.
+    """
+
+    name = "archive"
+    writes_to_filesystem = False
+
+    def __init__(self, archive_path, archive_format=None, nested_format=None, compress_level=6, spool_size=1 << 18,
+                 max_open_folders=16):
+        super().__init__()
+        self.archive_path = archive_path
+        self.archive_format = archive_format or archive_format_for_path(archive_path)
+        self.nested_format = nested_format
+        if nested_format is not None and nested_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format '{nested_format}', expected one of {ARCHIVE_FORMATS}")
+        self.compress_level = compress_level
+        self.spool_size = spool_size
+        self.max_open_folders = max_open_folders
+        self._lock = threading.Lock()
+        self._file = open(archive_path, "wb")
+        self._archive = _Archive(self._file, self.archive_format, compress_level)
+        # Folder member name -> (spool file, inner archive, member name), least recently written first; only
+        # used with nested_format.
+        self._nested = OrderedDict()
+        # Folder member name -> number of inner archives already started for it.
+        self._nested_parts = {}
+        self._closed = False
+
+    def ensure_folder(self, folder_path) -> None:
+        # Folders only exist as member name prefixes inside the archive.
+        pass
+
+    def precreate_folders(self, folder_paths) -> None:
+        pass
+
+    def create_tree(self, folder_paths) -> None:
+        pass
+
+    def write(self, full_path, data) -> None:
+        name = member_name(full_path)
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"Archive '{self.archive_path}' is already closed")
+            if self.nested_format is None:
+                self._archive.add(name, bytes(data))
+                return
+            folder, file_name = posixpath.split(name)
+            nested = self._nested.get(folder)
+            if nested is None:
+                if len(self._nested) >= self.max_open_folders:
+                    self._store_nested(*self._nested.popitem(last=False)[1])
+                part = self._nested_parts[folder] = self._nested_parts.get(folder, 0) + 1
+                member = f"{folder or 'root'}{f'.part{part}' if part > 1 else ''}.{self.nested_format}"
+                spool = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+                nested = self._nested[folder] = (spool, _Archive(spool, self.nested_format, self.compress_level), member)
+            else:
+                self._nested.move_to_end(folder)
+            nested[1].add(file_name, bytes(data))
+
+    def _store_nested(self, spool, inner, member) -> None:
+        """Finishes an inner archive and stores it in the outer one."""
+        inner.close()
+        size = spool.tell()
+        spool.seek(0)
+        self._archive.add_file(member, spool, size)
+        spool.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for folder, nested in sorted(self._nested.items()):
+                self._store_nested(*nested)
+            self._nested.clear()
+            self._archive.close()
+            self._file.close()
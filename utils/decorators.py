@@ -1,13 +1,30 @@
+import functools
 import logging
+import time
+
+from utils.instrumentation import instrumentation
 
 
 def log_function_status(func):
-    """Decorator that prints the name of the function being called."""
+    """Decorator that logs the start and end of the function and times it when instrumentation is on."""
+    name = func.__name__
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        logging.info(f"Started: {func.__name__}")
-        result = func(*args, **kwargs)  # Call the original function
-        logging.info(f"Ended: {func.__name__}")
+        # Level-gated, so nothing is formatted when the status level is filtered out.
+        log = logging.root.isEnabledFor(instrumentation.status_log_level)
+        if log:
+            logging.log(instrumentation.status_log_level, "Started: %s", name)
+        if instrumentation.enabled:
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)  # Call the original function
+            finally:
+                instrumentation.observe("function_seconds", time.perf_counter() - start, function=name)
+        else:
+            result = func(*args, **kwargs)
+        if log:
+            logging.log(instrumentation.status_log_level, "Ended: %s", name)
         return result  # Return the actual output of the function
 
-    return wrapper
\ No newline at end of file
+    return wrapper
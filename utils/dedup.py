@@ -0,0 +1,119 @@
+import errno
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from utils.filesystem import LINK_MODES
+from utils.instrumentation import instrumentation
+
+# Errors meaning the filesystem cannot make reflinks at all, rather than failing for one file.
+REFLINK_UNSUPPORTED = (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS)
+
+# Distinct bodies remembered at once; the least recently used one is forgotten and written again when it recurs.
+DEFAULT_MAX_SOURCES = 65536
+
+
+class ContentStore:
+    """Content-addressed store of generated bodies: the first file with a body is written, every later file with
+    the same body links to it (a hardlink, a reflink or a kernel copy, see FileSystemTarget.link).
+
+    max_links caps the links to one written file; the next file with that body is written again and takes over as
+    the source, so max_links controls how duplicate-heavy the tree is. Without reflink support, reflink falls back
+    to copy. Only the max_sources most recently used bodies are remembered, so memory stays bounded in scale mode.
+    """
+
+    def __init__(self, mode="hardlink", max_links=None, max_sources=DEFAULT_MAX_SOURCES):
+        if mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{mode}', expected one of {LINK_MODES}")
+        self.mode = mode
+        self.max_links = max_links
+        self.max_sources = max_sources
+        # Digest -> [path of the file written with the body, links made to it], least recently used first.
+        self._sources = OrderedDict()
+        # Path of every source -> its digest, to forget the source once the path is rewritten.
+        self._source_digests = {}
+        self._lock = threading.Lock()
+        self.files_written = 0
+        self.files_linked = 0
+        self.bytes_linked = 0
+
+    def write(self, writer, full_path, data, shareable=True) -> None:
+        """Writes the file through the writer, or links it to an earlier file with the same body.
+
+        Files that are not shareable (hidden or trashed ones, whose attributes or location change afterwards) are
+        always written and never become a source.
+        """
+        filesystem = writer.filesystem
+        digest = hashlib.blake2b(data, digest_size=16).digest() if shareable else None
+        source = None
+        with self._lock:
+            # Whatever the path held is about to be replaced, so it no longer has any body to link to.
+            self._forget(full_path)
+            if shareable:
+                entry = self._sources.get(digest)
+                if entry is not None and (self.max_links is None or entry[1] < self.max_links):
+                    entry[1] += 1
+                    source = entry[0]
+                    self._sources.move_to_end(digest)
+        if source is not None and source != full_path and self._link(writer, source, full_path):
+            with self._lock:
+                self.files_linked += 1
+                self.bytes_linked += len(data)
+            if instrumentation.enabled:
+                instrumentation.count("files_linked", mode=self.mode)
+                instrumentation.count("bytes_linked", len(data), mode=self.mode)
+            return
+
+        # An earlier run may have left a link here; writing through it would change every file sharing it.
+        filesystem.remove(full_path)
+        writer.write(full_path, data)
+        with self._lock:
+            self.files_written += 1
+            if shareable:
+                self._forget(full_path)
+                previous = self._sources.pop(digest, None)
+                if previous is not None:
+                    del self._source_digests[previous[0]]
+                self._sources[digest] = [full_path, 0]
+                self._source_digests[full_path] = digest
+                if len(self._sources) > self.max_sources:
+                    _, (evicted_path, _) = self._sources.popitem(last=False)
+                    del self._source_digests[evicted_path]
+
+    def _forget(self, full_path) -> None:
+        """Drops the body the path was the source of; the caller holds the lock."""
+        digest = self._source_digests.pop(full_path, None)
+        if digest is not None:
+            del self._sources[digest]
+
+    def _link(self, writer, source, full_path) -> bool:
+        """Links the file to the source; False when it has to be written instead."""
+        flushed = False
+        for _ in range(4):
+            try:
+                writer.filesystem.link(source, full_path, self.mode)
+                return True
+            except FileExistsError:
+                writer.filesystem.remove(full_path)
+            except FileNotFoundError:
+                if flushed:
+                    # The source is gone for good, e.g. removed by hand; the file is written as a new source.
+                    return False
+                # The source may still be waiting in the writer's batch.
+                writer.flush()
+                flushed = True
+            except OSError as e:
+                if self.mode == "reflink" and e.errno in REFLINK_UNSUPPORTED:
+                    logging.warning(f"The filesystem does not support reflinks ({e}), copying duplicates instead")
+                    self.mode = "copy"
+                    continue
+                # E.g. the hardlink limit of the source was reached; a new source takes over.
+                logging.debug(f"Could not link '{full_path}' to '{source}': {e}")
+                return False
+        return False
+
+    def log_summary(self) -> None:
+        if self.files_linked:
+            logging.info(f"Linked {self.files_linked} duplicate files to {self.files_written} written files "
+                         f"({self.mode}, {self.bytes_linked} bytes not written)")
@@ -0,0 +1,288 @@
+"""Prebuilt skeletons of the rich document formats: XLSX, PPTX, PDF and EML.
+
+Like DocxTemplate, every format is laid out once and only the bytes around the secret change per file, so
+rendering one costs a deflate (XLSX/PPTX) or a few byte joins (PDF/EML). Use document_template() to get the
+shared instance of a format.
+"""
+import base64
+import functools
+
+from config.file_extension_enum import FileExtensionEnum
+from utils.docx_template import OoxmlTemplate, XML_DECLARATION, RELATIONSHIPS_NAMESPACE, OFFICE_RELATIONSHIP, escape
+
+SPREADSHEET_NAMESPACE = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+PRESENTATION_NAMESPACE = "http://schemas.openxmlformats.org/presentationml/2006/main"
+DRAWING_NAMESPACE = "http://schemas.openxmlformats.org/drawingml/2006/main"
+OFFICE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument"
+
+# Title shown above the secret in every format.
+DOCUMENT_TITLE = "Deployment credentials"
+
+
+def _content_types(overrides):
+    return (
+        XML_DECLARATION +
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>' +
+        "".join(f'<Override PartName="{part}" ContentType="{OFFICE_CONTENT_TYPE}.{content_type}"/>'
+                for part, content_type in overrides) +
+        '</Types>'
+    )
+
+
+def _relationships(relationships):
+    return (
+        XML_DECLARATION +
+        f'<Relationships xmlns="{RELATIONSHIPS_NAMESPACE}">' +
+        "".join(f'<Relationship Id="rId{index}" Type="{OFFICE_RELATIONSHIP}/{kind}" Target="{target}"/>'
+                for index, (kind, target) in enumerate(relationships, start=1)) +
+        '</Relationships>'
+    )
+
+
+def _inline_cell(reference, text):
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+XLSX_STATIC_PARTS = (
+    ("[Content_Types].xml", _content_types((
+        ("/xl/workbook.xml", "spreadsheetml.sheet.main+xml"),
+        ("/xl/worksheets/sheet1.xml", "spreadsheetml.worksheet+xml"),
+        ("/xl/styles.xml", "spreadsheetml.styles+xml"),
+    ))),
+    ("_rels/.rels", _relationships((("officeDocument", "xl/workbook.xml"),))),
+    ("xl/workbook.xml", XML_DECLARATION +
+     f'<workbook xmlns="{SPREADSHEET_NAMESPACE}" xmlns:r="{OFFICE_RELATIONSHIP}">'
+     '<sheets><sheet name="Credentials" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    ("xl/_rels/workbook.xml.rels", _relationships((("worksheet", "worksheets/sheet1.xml"), ("styles", "styles.xml")))),
+    ("xl/styles.xml", XML_DECLARATION +
+     f'<styleSheet xmlns="{SPREADSHEET_NAMESPACE}">'
+     '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+     '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+     '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+     '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+     '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+     '</styleSheet>'),
+)
+# Inline strings keep the secret in the worksheet, so no shared string table has to change per file.
+XLSX_SHEET_HEAD = (
+    XML_DECLARATION +
+    f'<worksheet xmlns="{SPREADSHEET_NAMESPACE}"><sheetData>'
+    f'<row r="1">{_inline_cell("A1", "Environment")}{_inline_cell("B1", "Key")}</row>'
+    f'<row r="2">{_inline_cell("A2", "production")}<c r="B2" t="inlineStr"><is><t xml:space="preserve">'
+)
+XLSX_SHEET_TAIL = '</t></is></c></row></sheetData></worksheet>'
+
+# A blank group shape tree, the minimum every slide, layout and master needs.
+EMPTY_SHAPE_TREE = ('<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+                    '<p:grpSpPr/>')
+PRESENTATION_NAMESPACES = f'xmlns:a="{DRAWING_NAMESPACE}" xmlns:r="{OFFICE_RELATIONSHIP}" xmlns:p="{PRESENTATION_NAMESPACE}"'
+THEME_COLORS = (
+    ("dk1", '<a:sysClr val="windowText" lastClr="000000"/>'), ("lt1", '<a:sysClr val="window" lastClr="FFFFFF"/>'),
+    ("dk2", '<a:srgbClr val="44546A"/>'), ("lt2", '<a:srgbClr val="E7E6E6"/>'),
+    ("accent1", '<a:srgbClr val="4472C4"/>'), ("accent2", '<a:srgbClr val="ED7D31"/>'),
+    ("accent3", '<a:srgbClr val="A5A5A5"/>'), ("accent4", '<a:srgbClr val="FFC000"/>'),
+    ("accent5", '<a:srgbClr val="5B9BD5"/>'), ("accent6", '<a:srgbClr val="70AD47"/>'),
+    ("hlink", '<a:srgbClr val="0563C1"/>'), ("folHlink", '<a:srgbClr val="954F72"/>'),
+)
+THEME_FONTS = '<a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/>'
+THEME_FILL = '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+THEME_XML = (
+    XML_DECLARATION +
+    f'<a:theme xmlns:a="{DRAWING_NAMESPACE}" name="Office Theme"><a:themeElements>'
+    '<a:clrScheme name="Office">' + "".join(f"<a:{name}>{color}</a:{name}>" for name, color in THEME_COLORS) +
+    '</a:clrScheme>'
+    f'<a:fontScheme name="Office"><a:majorFont>{THEME_FONTS}</a:majorFont><a:minorFont>{THEME_FONTS}</a:minorFont>'
+    '</a:fontScheme>'
+    f'<a:fmtScheme name="Office"><a:fillStyleLst>{THEME_FILL * 3}</a:fillStyleLst>'
+    '<a:lnStyleLst>' + f'<a:ln w="6350">{THEME_FILL}</a:ln>' * 3 + '</a:lnStyleLst>'
+    '<a:effectStyleLst>' + '<a:effectStyle><a:effectLst/></a:effectStyle>' * 3 + '</a:effectStyleLst>'
+    f'<a:bgFillStyleLst>{THEME_FILL * 3}</a:bgFillStyleLst></a:fmtScheme>'
+    '</a:themeElements></a:theme>'
+)
+COLOR_MAP = ('bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" accent3="accent3" '
+             'accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" folHlink="folHlink"')
+
+PPTX_STATIC_PARTS = (
+    ("[Content_Types].xml", _content_types((
+        ("/ppt/presentation.xml", "presentationml.presentation.main+xml"),
+        ("/ppt/slides/slide1.xml", "presentationml.slide+xml"),
+        ("/ppt/slideLayouts/slideLayout1.xml", "presentationml.slideLayout+xml"),
+        ("/ppt/slideMasters/slideMaster1.xml", "presentationml.slideMaster+xml"),
+        ("/ppt/theme/theme1.xml", "theme+xml"),
+    ))),
+    ("_rels/.rels", _relationships((("officeDocument", "ppt/presentation.xml"),))),
+    ("ppt/presentation.xml", XML_DECLARATION +
+     f'<p:presentation {PRESENTATION_NAMESPACES}>'
+     '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+     '<p:sldIdLst><p:sldId id="256" r:id="rId2"/></p:sldIdLst>'
+     '<p:sldSz cx="9144000" cy="6858000"/><p:notesSz cx="6858000" cy="9144000"/></p:presentation>'),
+    ("ppt/_rels/presentation.xml.rels", _relationships((("slideMaster", "slideMasters/slideMaster1.xml"),
+                                                        ("slide", "slides/slide1.xml"), ("theme", "theme/theme1.xml")))),
+    ("ppt/slideMasters/slideMaster1.xml", XML_DECLARATION +
+     f'<p:sldMaster {PRESENTATION_NAMESPACES}><p:cSld><p:spTree>{EMPTY_SHAPE_TREE}</p:spTree></p:cSld>'
+     f'<p:clrMap {COLOR_MAP}/>'
+     '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/></p:sldLayoutIdLst></p:sldMaster>'),
+    ("ppt/slideMasters/_rels/slideMaster1.xml.rels", _relationships((("slideLayout", "../slideLayouts/slideLayout1.xml"),
+                                                                     ("theme", "../theme/theme1.xml")))),
+    ("ppt/slideLayouts/slideLayout1.xml", XML_DECLARATION +
+     f'<p:sldLayout {PRESENTATION_NAMESPACES} type="blank"><p:cSld name="Blank"><p:spTree>{EMPTY_SHAPE_TREE}'
+     '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>'),
+    ("ppt/slideLayouts/_rels/slideLayout1.xml.rels", _relationships((("slideMaster", "../slideMasters/slideMaster1.xml"),))),
+    ("ppt/theme/theme1.xml", THEME_XML),
+    ("ppt/slides/_rels/slide1.xml.rels", _relationships((("slideLayout", "../slideLayouts/slideLayout1.xml"),))),
+)
+
+
+def _text_box(shape_id, name, y, size, text):
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr><a:xfrm><a:off x="457200" y="{y}"/><a:ext cx="8229600" cy="1143000"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr>'
+            f'<p:txBody><a:bodyPr/><a:lstStyle/><a:p><a:r><a:rPr lang="en-US" sz="{size}"/><a:t>{text}')
+
+
+PPTX_SLIDE_HEAD = (
+    XML_DECLARATION +
+    f'<p:sld {PRESENTATION_NAMESPACES}><p:cSld><p:spTree>{EMPTY_SHAPE_TREE}' +
+    _text_box(2, "Title", 457200, 3200, DOCUMENT_TITLE) + '</a:t></a:r></a:p></p:txBody></p:sp>' +
+    _text_box(3, "Body", 1828800, 1800, "")
+)
+PPTX_SLIDE_TAIL = ('</a:t></a:r></a:p></p:txBody></p:sp></p:spTree></p:cSld>'
+                   '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>')
+
+
+class XlsxTemplate(OoxmlTemplate):
+    """Builds .xlsx workbooks with the secret in a cell of their only worksheet."""
+
+    escape = staticmethod(escape)
+
+    def __init__(self, compress_level=6):
+        super().__init__(XLSX_STATIC_PARTS, "xl/worksheets/sheet1.xml", compress_level=compress_level)
+        self._head = XLSX_SHEET_HEAD.encode("utf-8")
+        self._tail = XLSX_SHEET_TAIL.encode("utf-8")
+
+    def render(self, secret_text) -> bytes:
+        return self.render_part(self._head + escape(secret_text).encode("utf-8") + self._tail)
+
+
+class PptxTemplate(OoxmlTemplate):
+    """Builds .pptx decks of one slide with a title and the secret in a text box."""
+
+    escape = staticmethod(escape)
+
+    def __init__(self, compress_level=6):
+        super().__init__(PPTX_STATIC_PARTS, "ppt/slides/slide1.xml", compress_level=compress_level)
+        self._head = PPTX_SLIDE_HEAD.encode("utf-8")
+        self._tail = PPTX_SLIDE_TAIL.encode("utf-8")
+
+    def render(self, secret_text) -> bytes:
+        return self.render_part(self._head + escape(secret_text).encode("utf-8") + self._tail)
+
+
+class PdfTemplate:
+    """Builds one-page .pdf files showing the secret as an uncompressed text string.
+
+    The page content is the last object, so every other object and the whole cross-reference table keep their
+    offsets; only the content length and the startxref value change per file.
+    """
+
+    OBJECTS = (
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    )
+
+    def __init__(self):
+        head = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+        offsets = []
+        for number, content in enumerate(self.OBJECTS, start=1):
+            offsets.append(sum(map(len, head)))
+            head.append(b"%d 0 obj\n%s\nendobj\n" % (number, content))
+        offsets.append(sum(map(len, head)))
+        self._head = b"".join(head) + b"5 0 obj\n"
+        self._content_head = b"BT /F1 18 Tf 72 720 Td (%s) Tj /F1 12 Tf 0 -36 Td (" % DOCUMENT_TITLE.encode("ascii")
+        self._content_tail = b") Tj ET"
+        # Every cross-reference entry is exactly 20 bytes, with the free head of the list first.
+        self._xref = (b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1) +
+                      b"".join(b"%010d 00000 n \n" % offset for offset in offsets) +
+                      b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n" % (len(offsets) + 1))
+
+    @staticmethod
+    def escape(text) -> str:
+        """Escapes text for a PDF literal string."""
+        return (text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+                .replace("\r", "\\r").replace("\n", "\\n"))
+
+    def render(self, secret_text) -> bytes:
+        # Helvetica only shows Latin-1, but the secret bytes are stored as UTF-8 so scanners find them verbatim.
+        content = self._content_head + self.escape(secret_text).encode("utf-8") + self._content_tail
+        stream = b"<< /Length %d >>\nstream\n%s\nendstream\nendobj\n" % (len(content), content)
+        return b"".join((self._head, stream, self._xref, b"%d\n%%%%EOF\n" % (len(self._head) + len(stream))))
+
+
+class EmlTemplate:
+    """Builds .eml messages carrying the secret in the text body and again in a base64 attachment."""
+
+    BOUNDARY = "==credentials-boundary=="
+    # Fixed headers keep the messages byte-identical for the same secret.
+    HEAD = (
+        "From: Deploy Bot <deploy@example.com>\r\n"
+        "To: ops@example.com\r\n"
+        f"Subject: {DOCUMENT_TITLE}\r\n"
+        "Date: Mon, 01 Jan 2024 00:00:00 +0000\r\n"
+        "Message-ID: <credentials@example.com>\r\n"
+        "MIME-Version: 1.0\r\n"
+        f'Content-Type: multipart/mixed; boundary="{BOUNDARY}"\r\n'
+        "\r\n"
+        f"--{BOUNDARY}\r\n"
+        'Content-Type: text/plain; charset="utf-8"\r\n'
+        "Content-Transfer-Encoding: 8bit\r\n"
+        "\r\n"
+        "Hi team,\r\n"
+        "\r\n"
+        "the credentials of the new deployment are below, the same ones are attached.\r\n"
+        "\r\n"
+    )
+    ATTACHMENT_HEAD = (
+        "\r\n"
+        "\r\n"
+        f"--{BOUNDARY}\r\n"
+        'Content-Type: text/plain; charset="utf-8"; name="credentials.txt"\r\n'
+        'Content-Disposition: attachment; filename="credentials.txt"\r\n'
+        "Content-Transfer-Encoding: base64\r\n"
+        "\r\n"
+    )
+    TAIL = f"\r\n--{BOUNDARY}--\r\n"
+
+    def __init__(self):
+        self._head = self.HEAD.encode("utf-8")
+        self._attachment_head = self.ATTACHMENT_HEAD.encode("utf-8")
+        self._tail = self.TAIL.encode("utf-8")
+
+    @staticmethod
+    def escape(text) -> str:
+        # The text part is 8bit, so the secret is stored as is.
+        return text
+
+    def render(self, secret_text) -> bytes:
+        data = secret_text.encode("utf-8")
+        # base64.encodebytes wraps at 76 characters, as MIME requires.
+        attachment = base64.encodebytes(data).replace(b"\n", b"\r\n").rstrip(b"\r\n")
+        return b"".join((self._head, data, self._attachment_head, attachment, self._tail))
+
+
+# Rich document formats rendered from a prebuilt skeleton, by FileExtensionEnum member.
+DOCUMENT_TEMPLATES = {
+    FileExtensionEnum.spreadsheet: XlsxTemplate,
+    FileExtensionEnum.presentation: PptxTemplate,
+    FileExtensionEnum.pdf: PdfTemplate,
+    FileExtensionEnum.email: EmlTemplate,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def document_template(extension):
+    """Builds the skeleton of a format once; every file of the format shares it."""
+    return DOCUMENT_TEMPLATES[extension]()
@@ -0,0 +1,147 @@
+import struct
+import zlib
+
+# Fixed timestamp (1980-01-01 00:00) so identical documents are byte-identical.
+ZIP_DOS_TIME = 0
+ZIP_DOS_DATE = (1 << 5) | 1
+ZIP_VERSION = 20
+ZIP_DEFLATED = 8
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+RELATIONSHIPS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+CONTENT_TYPES_XML = (
+    XML_DECLARATION +
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+
+PACKAGE_RELS_XML = (
+    XML_DECLARATION +
+    f'<Relationships xmlns="{RELATIONSHIPS_NAMESPACE}">'
+    f'<Relationship Id="rId1" Type="{OFFICE_RELATIONSHIP}/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+DOCUMENT_RELS_XML = (
+    XML_DECLARATION +
+    f'<Relationships xmlns="{RELATIONSHIPS_NAMESPACE}">'
+    f'<Relationship Id="rId1" Type="{OFFICE_RELATIONSHIP}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+STYLES_XML = (
+    XML_DECLARATION +
+    f'<w:styles xmlns:w="{WORD_NAMESPACE}">'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/><w:basedOn w:val="Normal"/>'
+    '<w:next w:val="Normal"/><w:pPr><w:keepNext/><w:outlineLvl w:val="0"/></w:pPr>'
+    '<w:rPr><w:b/><w:sz w:val="28"/></w:rPr></w:style>'
+    '</w:styles>'
+)
+
+# Same content as the python-docx document: a heading, the secret, and a paragraph with bold text.
+DOCUMENT_XML_HEAD = (
+    XML_DECLARATION +
+    f'<w:document xmlns:w="{WORD_NAMESPACE}"><w:body>'
+    '<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t xml:space="preserve">{title}</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t xml:space="preserve">'
+)
+DOCUMENT_XML_TAIL = (
+    '</w:t></w:r></w:p>'
+    '<w:p><w:pPr><w:pStyle w:val="Normal"/></w:pPr>'
+    '<w:r><w:t xml:space="preserve">This is another paragraph with </w:t></w:r>'
+    '<w:r><w:rPr><w:b/></w:rPr><w:t>bold text.</w:t></w:r></w:p>'
+    '<w:sectPr/></w:body></w:document>'
+)
+
+# Parts that never change, in the order they are stored in the archive.
+STATIC_PARTS = (
+    ("[Content_Types].xml", CONTENT_TYPES_XML),
+    ("_rels/.rels", PACKAGE_RELS_XML),
+    ("word/_rels/document.xml.rels", DOCUMENT_RELS_XML),
+    ("word/styles.xml", STYLES_XML),
+)
+DOCUMENT_PART = "word/document.xml"
+
+
+def escape(text) -> str:
+    """Escapes text for an XML element; xml.sax.saxutils would pull in urllib.request at import."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _deflate(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _local_header(name, crc, compressed_size, size):
+    return struct.pack("<4s5H3L2H", b"PK\x03\x04", ZIP_VERSION, 0, ZIP_DEFLATED, ZIP_DOS_TIME, ZIP_DOS_DATE,
+                       crc, compressed_size, size, len(name), 0) + name
+
+
+def _central_header(name, crc, compressed_size, size, offset):
+    return struct.pack("<4s6H3L5H2L", b"PK\x01\x02", ZIP_VERSION, ZIP_VERSION, 0, ZIP_DEFLATED, ZIP_DOS_TIME,
+                       ZIP_DOS_DATE, crc, compressed_size, size, len(name), 0, 0, 0, 0, 0, offset) + name
+
+
+class OoxmlTemplate:
+    """Builds Office Open XML packages from a skeleton prepared once; only one part changes per file.
+
+    The static parts are compressed once and their local and central zip records are precomputed, so a
+    package costs one small deflate and a few byte joins, whatever the format.
+    """
+
+    def __init__(self, static_parts, dynamic_part, compress_level=6):
+        self.compress_level = compress_level
+        self._dynamic_name = dynamic_part.encode("utf-8")
+
+        local_records = []
+        central_records = []
+        offset = 0
+        for name, content in static_parts:
+            name = name.encode("utf-8")
+            data = content.encode("utf-8")
+            compressed = _deflate(data, 9)
+            crc = zlib.crc32(data)
+            local_records.append(_local_header(name, crc, len(compressed), len(data)) + compressed)
+            central_records.append(_central_header(name, crc, len(compressed), len(data), offset))
+            offset += len(local_records[-1])
+        self._static_local = b"".join(local_records)
+        self._static_central = b"".join(central_records)
+        self._entry_count = len(static_parts) + 1
+
+    def render_part(self, data) -> bytes:
+        """Returns the bytes of a package whose dynamic part holds the given data."""
+        compressed = _deflate(data, self.compress_level)
+        crc = zlib.crc32(data)
+
+        dynamic_offset = len(self._static_local)
+        local = _local_header(self._dynamic_name, crc, len(compressed), len(data))
+        central = self._static_central + _central_header(self._dynamic_name, crc, len(compressed), len(data),
+                                                         dynamic_offset)
+        central_offset = dynamic_offset + len(local) + len(compressed)
+        end_record = struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, self._entry_count, self._entry_count,
+                                 len(central), central_offset, 0)
+        return b"".join((self._static_local, local, compressed, central, end_record))
+
+
+class DocxTemplate(OoxmlTemplate):
+    """Builds .docx files from an OOXML skeleton prepared once; only word/document.xml changes per file."""
+
+    def __init__(self, title="My Document Title", compress_level=6):
+        super().__init__(STATIC_PARTS, DOCUMENT_PART, compress_level=compress_level)
+        self._document_head = DOCUMENT_XML_HEAD.replace("{title}", escape(title)).encode("utf-8")
+        self._document_tail = DOCUMENT_XML_TAIL.encode("utf-8")
+
+    def render(self, secret_text) -> bytes:
+        """Returns the bytes of a .docx file whose body paragraph holds the secret."""
+        return self.render_part(self._document_head + escape(secret_text).encode("utf-8") + self._document_tail)
@@ -0,0 +1,328 @@
+import errno
+import os
+import posixpath
+import threading
+
+# Flags used to open every generated file; O_BINARY keeps Windows from translating newlines.
+WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Size of the blocks the in-memory arena stores file contents in.
+DEFAULT_BLOCK_SIZE = 16 << 20
+
+# Ways a file can share the contents of another one (see FileSystemTarget.link).
+LINK_MODES = ("hardlink", "reflink", "copy")
+
+# ioctl cloning a whole file into another on Linux filesystems with reflinks (Btrfs, XFS).
+FICLONE = 0x40049409
+
+
+def copy_range(source_fd, target_fd, source_offset, target_offset, count) -> int:
+    """Copies up to count bytes between the files inside the kernel where possible; returns the bytes copied."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            return os.copy_file_range(source_fd, target_fd, count, source_offset, target_offset)
+        except OSError as e:
+            # Some filesystems and older kernels refuse it; sendfile still copies inside the kernel.
+            if e.errno not in (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise
+    if hasattr(os, "sendfile"):
+        # sendfile writes at the current position of the target.
+        os.lseek(target_fd, target_offset, os.SEEK_SET)
+        return os.sendfile(target_fd, source_fd, source_offset, count)
+    os.lseek(source_fd, source_offset, os.SEEK_SET)
+    os.lseek(target_fd, target_offset, os.SEEK_SET)
+    return os.write(target_fd, os.read(source_fd, count))
+
+
+class FileSystemTarget:
+    """Where the writers put generated files: the real disk or an in-memory filesystem."""
+
+    # Name the target is created by.
+    name = "base"
+
+    def makedirs(self, folder_path) -> None:
+        raise NotImplementedError
+
+    def mkdir_tree(self, folder_paths) -> None:
+        """Creates a planned tree of folders, listed with every parent before its children.
+
+        Only the first folder may have missing parents; every other one is created with a single mkdir.
+        """
+        for folder_path in folder_paths:
+            self.makedirs(folder_path)
+
+    def write_chunks(self, full_path, chunks) -> int:
+        """Writes the file from an iterable of byte chunks and returns its size."""
+        raise NotImplementedError
+
+    def write_file(self, full_path, data) -> int:
+        return self.write_chunks(full_path, (data,))
+
+    def read_file(self, full_path) -> bytes:
+        raise NotImplementedError
+
+    def exists(self, full_path) -> bool:
+        raise NotImplementedError
+
+    def remove(self, full_path) -> None:
+        """Removes the file if it exists."""
+        raise NotImplementedError
+
+    def link(self, source_path, full_path, mode="hardlink") -> None:
+        """Makes full_path a file with the contents of source_path, sharing them as far as the mode allows.
+
+        hardlink adds a name to the same file, reflink clones its blocks copy-on-write and copy duplicates them.
+        Raises FileExistsError when full_path exists.
+        """
+        raise NotImplementedError
+
+    def size(self, full_path):
+        """Returns the size of the file, or None when it does not exist."""
+        raise NotImplementedError
+
+
+class DiskFileSystem(FileSystemTarget):
+    """Writes files to the real filesystem with raw file descriptors."""
+
+    name = "disk"
+
+    def makedirs(self, folder_path) -> None:
+        os.makedirs(folder_path, exist_ok=True)
+
+    def mkdir_tree(self, folder_paths) -> None:
+        folder_paths = iter(folder_paths)
+        for folder_path in folder_paths:
+            self.makedirs(folder_path)
+            break
+        for folder_path in folder_paths:
+            # The parent was created just before, so there is nothing to check first.
+            try:
+                os.mkdir(folder_path)
+            except FileExistsError:
+                pass
+
+    def write_chunks(self, full_path, chunks) -> int:
+        size = 0
+        fd = os.open(full_path, WRITE_FLAGS, 0o666)
+        try:
+            for chunk in chunks:
+                # Partial writes continue from a view, without copying the rest of the chunk.
+                view = memoryview(chunk)
+                size += len(view)
+                while view:
+                    view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        return size
+
+    def read_file(self, full_path) -> bytes:
+        with open(full_path, "rb") as file:
+            return file.read()
+
+    def exists(self, full_path) -> bool:
+        return os.path.exists(full_path)
+
+    def remove(self, full_path) -> None:
+        try:
+            os.remove(full_path)
+        except FileNotFoundError:
+            pass
+
+    def link(self, source_path, full_path, mode="hardlink") -> None:
+        if mode == "hardlink":
+            os.link(source_path, full_path)
+            return
+        source_fd = os.open(source_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            fd = os.open(full_path, WRITE_FLAGS | os.O_EXCL, 0o666)
+            try:
+                if mode == "reflink":
+                    self._clone(source_fd, fd)
+                else:
+                    self._copy(source_fd, fd)
+            except OSError:
+                # No half-made file is left behind for the caller's fallback to trip over.
+                os.close(fd)
+                os.remove(full_path)
+                raise
+            os.close(fd)
+        finally:
+            os.close(source_fd)
+
+    @staticmethod
+    def _copy(source_fd, fd) -> None:
+        size = os.fstat(source_fd).st_size
+        copied = 0
+        while copied < size:
+            done = copy_range(source_fd, fd, copied, copied, size - copied)
+            if done == 0:
+                break
+            copied += done
+
+    @staticmethod
+    def _clone(source_fd, fd) -> None:
+        try:
+            import fcntl
+        except ImportError:
+            raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform") from None
+        fcntl.ioctl(fd, FICLONE, source_fd)
+
+    def size(self, full_path):
+        try:
+            return os.stat(full_path).st_size
+        except OSError:
+            return None
+
+
+def normalize_memory_path(path) -> str:
+    """Key of a path in the in-memory filesystem: '/' separators, no '.' or empty components."""
+    return posixpath.normpath(path.replace("\\", "/")).lstrip("/")
+
+
+class MemoryFileSystem(FileSystemTarget):
+    """In-memory filesystem storing file contents back to back in a compact arena with a path index.
+
+    Contents live in fixed-size bytearray blocks that never resize, so iter_files can hand out zero-copy
+    memoryviews to an in-process scanner. Rewriting a file leaves its old bytes behind until compact().
+    """
+
+    name = "memory"
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self._blocks = []
+        # Block small files are appended to, and the bytes used in it.
+        self._current = None
+        self._used = 0
+        # Normalized path -> (block index, offset, length).
+        self._index = {}
+        self._folders = set()
+        self._lock = threading.Lock()
+
+    def makedirs(self, folder_path) -> None:
+        folder = normalize_memory_path(folder_path)
+        with self._lock:
+            while folder and folder != "." and folder not in self._folders:
+                self._folders.add(folder)
+                folder = posixpath.dirname(folder)
+
+    def mkdir_tree(self, folder_paths) -> None:
+        folder_paths = iter(folder_paths)
+        for folder_path in folder_paths:
+            self.makedirs(folder_path)
+            break
+        with self._lock:
+            self._folders.update(normalize_memory_path(folder_path) for folder_path in folder_paths)
+
+    def write_chunks(self, full_path, chunks) -> int:
+        data = b"".join(chunks)
+        key = normalize_memory_path(full_path)
+        with self._lock:
+            self._index[key] = self._store(data)
+        return len(data)
+
+    def read_file(self, full_path) -> bytes:
+        return bytes(self.view(full_path))
+
+    def view(self, full_path) -> memoryview:
+        """Returns a zero-copy view of the file's contents."""
+        key = normalize_memory_path(full_path)
+        with self._lock:
+            if key not in self._index:
+                raise FileNotFoundError(full_path)
+            block, offset, length = self._index[key]
+            return memoryview(self._blocks[block])[offset:offset + length]
+
+    def exists(self, full_path) -> bool:
+        key = normalize_memory_path(full_path)
+        return key in self._index or key in self._folders
+
+    def remove(self, full_path) -> None:
+        with self._lock:
+            self._index.pop(normalize_memory_path(full_path), None)
+
+    def link(self, source_path, full_path, mode="hardlink") -> None:
+        # Every mode shares the bytes in the arena; contents are never modified in place.
+        key = normalize_memory_path(full_path)
+        with self._lock:
+            if key in self._index:
+                raise FileExistsError(errno.EEXIST, "File exists", full_path)
+            location = self._index.get(normalize_memory_path(source_path))
+            if location is None:
+                raise FileNotFoundError(errno.ENOENT, "No such file", source_path)
+            self._index[key] = location
+
+    def size(self, full_path):
+        location = self._index.get(normalize_memory_path(full_path))
+        return None if location is None else location[2]
+
+    def iter_files(self):
+        """Yields (path, memoryview) for every file, e.g. to feed an in-process scanner."""
+        with self._lock:
+            items = sorted(self._index.items())
+            blocks = list(self._blocks)
+        for key, (block, offset, length) in items:
+            yield key, memoryview(blocks[block])[offset:offset + length]
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes of live file contents."""
+        return sum(length for _, _, length in self._index.values())
+
+    @property
+    def arena_bytes(self) -> int:
+        """Bytes allocated for the arena, including space of rewritten files and unused block tails."""
+        return sum(len(block) for block in self._blocks)
+
+    def compact(self) -> None:
+        """Rebuilds the arena with only the current contents of every file."""
+        with self._lock:
+            items = [(key, bytes(memoryview(self._blocks[block])[offset:offset + length]))
+                     for key, (block, offset, length) in self._index.items()]
+            self._blocks = []
+            self._current = None
+            self._used = 0
+            self._index = {key: self._store(data) for key, data in items}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks = []
+            self._current = None
+            self._used = 0
+            self._index = {}
+            self._folders = set()
+
+    def _store(self, data):
+        length = len(data)
+        if length > self.block_size:
+            # Files larger than a block get a block of their own.
+            self._blocks.append(bytearray(data))
+            return len(self._blocks) - 1, 0, length
+        if self._current is None or self._used + length > self.block_size:
+            self._blocks.append(bytearray(self.block_size))
+            self._current = len(self._blocks) - 1
+            self._used = 0
+        offset = self._used
+        self._blocks[self._current][offset:offset + length] = data
+        self._used += length
+        return self._current, offset, length
+
+
+def create_filesystem(name="disk", **kwargs) -> FileSystemTarget:
+    """Creates a filesystem target by name."""
+    filesystems = {"disk": DiskFileSystem, "memory": MemoryFileSystem}
+    if name not in filesystems:
+        raise ValueError(f"Unknown filesystem '{name}', expected one of {sorted(filesystems)}")
+    return filesystems[name](**kwargs)
+
+
+def resolve_filesystem(filesystem=None) -> FileSystemTarget:
+    """Returns the given filesystem target, creating it first when given by name; the disk by default."""
+    if filesystem is None:
+        return DiskFileSystem()
+    if isinstance(filesystem, str):
+        return create_filesystem(filesystem)
+    return filesystem
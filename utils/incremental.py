@@ -0,0 +1,110 @@
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+
+from utils.filesystem import DiskFileSystem
+from utils.renderers import TEMPLATE_VERSION
+
+# Filesystem the state checks files on unless the writer uses another one.
+DISK = DiskFileSystem()
+
+CREATE_STATE_SQL = (
+    "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, input_hash TEXT NOT NULL, size INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS scenarios (name TEXT PRIMARY KEY, input_hash TEXT NOT NULL)",
+)
+
+
+def _hash(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def file_input_hash(file_spec) -> str:
+    """Hash of everything a generated file is built from: secret, suffix, template version, flags and encoding."""
+    inputs = [TEMPLATE_VERSION, file_spec.suffix, file_spec.secret, file_spec.is_hidden, file_spec.recycle_bin]
+    if file_spec.encoding is not None:
+        # Only appended when set, so files written before encodings existed keep their hash.
+        inputs.append(file_spec.encoding)
+    return _hash(inputs)
+
+
+def scenario_input_hash(spec, secrets, shard=None) -> str:
+    """Hash of a declarative scenario together with the secrets it is planned from and the shard running it."""
+    # Secrets stores carry a content hash of their catalog, so it does not have to be decoded here.
+    secrets_key = getattr(secrets, "fingerprint", None) or list(secrets)
+    inputs = [TEMPLATE_VERSION, dataclasses.asdict(spec), secrets_key]
+    if shard is not None:
+        inputs.append(str(shard))
+    return _hash(inputs)
+
+
+class GenerationState:
+    """Persistent state of an incremental run, mapping every generated path to the hash of its inputs.
+
+    Rows are committed in batches, so a crash loses at most the last batch; those files are simply written
+    again on the next run. A file only counts as current while it exists with the recorded size, which also
+    catches files cut short by a crash. Several processes may share one state file.
+    """
+
+    def __init__(self, file_path, commit_every=10000):
+        self.file_path = file_path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, timeout=60, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in CREATE_STATE_SQL:
+            self._connection.execute(statement)
+        self._connection.commit()
+
+    def current_size(self, full_path, input_hash, recycle_bin=False, filesystem=None):
+        """Returns the size of the file when it is up to date with the inputs, otherwise None."""
+        with self._lock:
+            row = self._connection.execute("SELECT input_hash, size FROM files WHERE path = ?", (full_path,)).fetchone()
+        if row is None or row[0] != input_hash:
+            return None
+        if recycle_bin:
+            # Files moved to the trash are no longer at their path; the recorded state is all there is.
+            return row[1]
+        size = (DISK if filesystem is None else filesystem).size(full_path)
+        return row[1] if size == row[1] else None
+
+    def record(self, full_path, input_hash, size) -> None:
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (full_path, input_hash, size))
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._commit()
+
+    def is_scenario_done(self, name, input_hash) -> bool:
+        with self._lock:
+            row = self._connection.execute("SELECT input_hash FROM scenarios WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == input_hash
+
+    def mark_scenario_done(self, name, input_hash) -> None:
+        """Marks a scenario as complete; its files must be on disk already."""
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO scenarios VALUES (?, ?)", (name, input_hash))
+            self._commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _commit(self) -> None:
+        self._connection.commit()
+        self._uncommitted = 0
@@ -0,0 +1,243 @@
+import itertools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds, in seconds, of the timing histogram buckets; one more bucket holds everything slower.
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every exported metric name.
+METRIC_PREFIX = "secret_generator_"
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations; cheap to update and to merge across workers."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other) -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """Estimates a quantile as the upper bound of the bucket holding it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "mean": self.sum / self.count if self.count else None,
+                "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99),
+                "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts))}
+
+
+class _NullTimer:
+    """Timer returned while instrumentation is off; entering and leaving it does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, instrumentation, name, labels):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Instrumentation:
+    """Counters and timing histograms of a run, exported as JSON or Prometheus text.
+
+    Everything is off by default: hot paths check `enabled` once and skip all timing, locking and
+    bookkeeping. Per-file log lines are level-gated and can be sampled with log_every.
+    """
+
+    def __init__(self, enabled=False, log_every=1, status_log_level=logging.INFO):
+        self.enabled = enabled
+        self.log_every = log_every
+        # Level of the Started/Ended lines logged around scenarios.
+        self.status_log_level = status_log_level
+        self._log_counter = itertools.count()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._started = time.perf_counter()
+
+    def configure(self, enabled=None, log_every=None, status_log_level=None) -> None:
+        if enabled is not None:
+            self.enabled = enabled
+        if log_every is not None:
+            if log_every < 1:
+                raise ValueError(f"log_every must be at least 1, got {log_every}")
+            self.log_every = log_every
+        if status_log_level is not None:
+            self.status_log_level = status_log_level
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+            self._started = time.perf_counter()
+
+    def should_log(self, level=logging.INFO) -> bool:
+        """True when a per-file message at this level passes the logger level and the sampling rate."""
+        if not logging.root.isEnabledFor(level):
+            return False
+        return self.log_every == 1 or next(self._log_counter) % self.log_every == 0
+
+    def count(self, name, value=1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name, **labels):
+        """Context manager timing its block into the named histogram; a no-op while disabled."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def record_write(self, writer, seconds, size) -> None:
+        """Records one file handed to a writer backend."""
+        labels = (("writer", writer),)
+        with self._lock:
+            self._counters[("files_written", labels)] = self._counters.get(("files_written", labels), 0) + 1
+            self._counters[("bytes_written", labels)] = self._counters.get(("bytes_written", labels), 0) + size
+            histogram = self._histograms.get(("write_seconds", labels))
+            if histogram is None:
+                histogram = self._histograms[("write_seconds", labels)] = Histogram()
+            histogram.observe(seconds)
+
+    def drain(self) -> dict:
+        """Returns the raw state recorded so far and starts over, for merging into another process."""
+        with self._lock:
+            state = {"counters": self._counters, "histograms": self._histograms}
+            self._counters = {}
+            self._histograms = {}
+        return state
+
+    def merge(self, state) -> None:
+        """Adds the raw state drained from another instance (e.g. a worker process)."""
+        with self._lock:
+            for key, value in state["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, other in state["histograms"].items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(other.buckets)
+                histogram.merge(other)
+
+    def totals(self, name) -> float:
+        """Sums a counter over all of its labels."""
+        with self._lock:
+            return sum(value for (counter, _), value in self._counters.items() if counter == name)
+
+    def snapshot(self) -> dict:
+        """Returns every metric and the overall throughput as a JSON-serializable dictionary."""
+        elapsed = time.perf_counter() - self._started
+        files = self.totals("files_written")
+        written = self.totals("bytes_written")
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), **histogram.to_dict()}
+                          for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0])]
+        return {"elapsed_seconds": elapsed, "files_written": files, "bytes_written": written,
+                "files_per_second": files / elapsed if elapsed else 0.0,
+                "bytes_per_second": written / elapsed if elapsed else 0.0,
+                "counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=4)
+
+    def to_prometheus(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name}_total counter")
+            for (counter, labels), value in counters:
+                if counter == name:
+                    lines.append(f"{METRIC_PREFIX}{name}_total{_labels(labels)} {value}")
+        for name in sorted({name for (name, _), _ in histograms}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+            for (histogram_name, labels), histogram in histograms:
+                if histogram_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip([repr(bound) for bound in histogram.buckets] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{_labels(labels)} {histogram.sum}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_path) -> None:
+        """Writes the metrics to a file, as Prometheus text for .prom/.txt paths and as JSON otherwise."""
+        content = self.to_prometheus() if file_path.endswith((".prom", ".txt")) else self.to_json()
+        with open(file_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(content)
+
+    def log_summary(self) -> None:
+        snapshot = self.snapshot()
+        logging.info(f"Wrote {snapshot['files_written']} files ({snapshot['bytes_written']} bytes) in "
+                     f"{snapshot['elapsed_seconds']:.2f}s: {snapshot['files_per_second']:.0f} files/sec")
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{name}="{_escape_label(value)}"' for name, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape_label(value) -> str:
+    """Escapes a label value for the Prometheus text format: backslash, double quote and newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Instrumentation shared by Tools, the writers and the scenario runners of this process.
+instrumentation = Instrumentation()
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+from typing import NamedTuple
+
+from utils.filesystem import copy_range, resolve_filesystem
+
+# Default size of the chunks streamed to disk; memory use stays around one chunk per file.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+FILLER_TEXT = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor incididunt ut labore et "
+    "dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex "
+    "ea commodo consequat. Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat "
+    "nulla pariatur. Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit "
+    "anim id est laborum.\n"
+)
+
+# Named placements understood by LargeFileGenerator.plan, besides explicit (negative = from the end) offsets.
+PLACEMENTS = ("start", "middle", "end", "chunk_boundary")
+
+# How the bytes around the secrets are produced:
+#   stream: every filler byte is written, chunk by chunk.
+#   sparse: the file is only truncated to its size, so the filler is a hole of zeros taking no disk space.
+#   preallocate: like sparse, but the blocks are reserved with posix_fallocate, so later writes cannot run out of space.
+#   template: the filler chunk is copied from a template file inside the kernel (copy_file_range, else sendfile),
+#             which shares the blocks instead of copying them on filesystems with reflinks (Btrfs, XFS).
+# Every mode but stream places the secrets through small mmap windows and only works on the real disk.
+FILL_MODES = ("stream", "sparse", "preallocate", "template")
+
+# Flags of the files filled in place; mmap needs them open for reading as well.
+IN_PLACE_FLAGS = os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def fits_chunk_boundary(size, chunk_size=DEFAULT_CHUNK_SIZE) -> bool:
+    """Whether a file is well past one chunk, so a chunk_boundary secret cannot run into the middle or end ones."""
+    return size >= 2 * chunk_size
+
+
+def default_placements(size, chunk_size=DEFAULT_CHUNK_SIZE) -> tuple:
+    """The named placements used when none are given; chunk_boundary only in files large enough for it."""
+    return tuple(placement for placement in PLACEMENTS
+                 if placement != "chunk_boundary" or fits_chunk_boundary(size, chunk_size))
+
+
+class SecretPlacement(NamedTuple):
+    """A secret embedded at an exact byte offset of a large file."""
+    offset: int
+    secret: dict
+    data: bytes
+    placement: str
+
+
+class LargeFileGenerator:
+    """Streams files of any size made of filler text, with secrets at controlled byte offsets.
+
+    With the template fill mode and no template_path, the file holds the same bytes as a streamed one.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, filler=FILLER_TEXT, fill="stream", template_path=None):
+        if fill not in FILL_MODES:
+            raise ValueError(f"Unknown fill mode '{fill}', expected one of {FILL_MODES}")
+        self.chunk_size = chunk_size
+        self.fill = fill
+        # Optional file whose contents are repeated as the filler in the template mode.
+        self.template_path = template_path
+        filler = filler.encode("utf-8")
+        # One filler chunk is built once and reused for every chunk that holds no secret.
+        self._filler_chunk = (filler * (chunk_size // len(filler) + 1))[:chunk_size]
+
+    def plan(self, size, secrets, placements):
+        """Resolves each placement to an offset; secrets are used in turn for the placements."""
+        planned = []
+        for index, placement in enumerate(placements):
+            secret = secrets[index % len(secrets)]
+            data = secret["example"].encode("utf-8")
+            planned.append(SecretPlacement(self._resolve_offset(size, len(data), placement), secret, data, str(placement)))
+
+        planned.sort(key=lambda item: item.offset)
+        for previous, current in zip(planned, planned[1:]):
+            if previous.offset + len(previous.data) > current.offset:
+                raise ValueError(f"Secrets at offsets {previous.offset} and {current.offset} overlap")
+        return planned
+
+    def _resolve_offset(self, size, length, placement):
+        if placement == "start":
+            offset = 0
+        elif placement == "middle":
+            offset = (size - length) // 2
+        elif placement == "end":
+            offset = size - length
+        elif placement == "chunk_boundary":
+            # Straddle the boundary between the first and second chunk.
+            if size < self.chunk_size + length:
+                raise ValueError(f"A chunk_boundary placement needs a file larger than one chunk ({self.chunk_size} bytes)")
+            offset = self.chunk_size - length // 2
+        elif isinstance(placement, int):
+            offset = placement if placement >= 0 else size + placement
+        else:
+            raise ValueError(f"Unknown placement '{placement}', expected one of {PLACEMENTS} or a byte offset")
+        if offset < 0 or offset + length > size:
+            raise ValueError(f"A {length} byte secret at offset {offset} does not fit in a {size} byte file")
+        return offset
+
+    def iter_chunks(self, size, planned):
+        """Yields the file content chunk by chunk, overlaying the planned secrets."""
+        pending = list(planned)
+        for chunk_start in range(0, size, self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size, size)
+            chunk = self._filler_chunk if chunk_end - chunk_start == self.chunk_size else self._filler_chunk[:chunk_end - chunk_start]
+            overlapping = [item for item in pending if item.offset < chunk_end and item.offset + len(item.data) > chunk_start]
+            if overlapping:
+                chunk = bytearray(chunk)
+                for item in overlapping:
+                    # Copy only the part of the secret that falls inside this chunk.
+                    start = max(item.offset, chunk_start)
+                    end = min(item.offset + len(item.data), chunk_end)
+                    chunk[start - chunk_start:end - chunk_start] = item.data[start - item.offset:end - item.offset]
+                pending = [item for item in pending if item.offset + len(item.data) > chunk_end]
+            yield chunk
+
+    def write(self, full_path, size, secrets, placements, filesystem=None):
+        """Writes the file to the filesystem (the disk by default), writes its sidecar manifest and returns the manifest.
+
+        Files filled in place have no content hash, since hashing them would read every byte that was never written.
+        """
+        filesystem = resolve_filesystem(filesystem)
+        planned = self.plan(size, secrets, placements)
+        allocated = None
+        if self.fill == "stream":
+            content_hash = hashlib.blake2b(digest_size=16)
+
+            def hashed_chunks():
+                for chunk in self.iter_chunks(size, planned):
+                    content_hash.update(chunk)
+                    yield chunk
+
+            filesystem.write_chunks(full_path, hashed_chunks())
+            content_hash = content_hash.hexdigest()
+        else:
+            if filesystem.name != "disk":
+                raise ValueError(f"The {self.fill} fill mode writes in place and needs the disk filesystem")
+            allocated = self.write_in_place(full_path, size, planned)
+            content_hash = None
+
+        manifest = {
+            "file": os.path.basename(full_path),
+            "size": size,
+            "chunk_size": self.chunk_size,
+            "fill": self.fill,
+            "content_hash": content_hash,
+            # Bytes of disk actually used, where the OS reports it.
+            "allocated_bytes": allocated,
+            "secrets": [{"name": item.secret["name"], "offset": item.offset, "length": len(item.data),
+                         "placement": item.placement} for item in planned],
+        }
+        filesystem.write_file(full_path + ".manifest.json", json.dumps(manifest, indent=4).encode("utf-8"))
+        return manifest
+
+    def write_in_place(self, full_path, size, planned):
+        """Sizes the file without writing its filler, places the secrets and returns the bytes allocated on disk."""
+        fd = os.open(full_path, IN_PLACE_FLAGS, 0o666)
+        try:
+            if self.fill == "preallocate" and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                if self.fill == "preallocate":
+                    logging.warning("posix_fallocate is not available here, the file is left sparse")
+                os.ftruncate(fd, size)
+            if self.fill == "template":
+                self._copy_template(fd, size, full_path)
+            for item in planned:
+                self._place(fd, item.offset, item.data)
+            blocks = getattr(os.fstat(fd), "st_blocks", None)
+        finally:
+            os.close(fd)
+        return None if blocks is None else blocks * 512
+
+    def _copy_template(self, fd, size, full_path) -> None:
+        """Fills the file with the template block repeated, copied file to file by the kernel."""
+        if self.template_path is None:
+            # The filler chunk itself is the template, so the result matches the stream mode byte for byte. It sits
+            # next to the file, since blocks can only be shared within one filesystem.
+            template_path = full_path + ".template"
+            template_fd = os.open(template_path, IN_PLACE_FLAGS, 0o600)
+            os.write(template_fd, self._filler_chunk)
+        else:
+            template_path = self.template_path
+            template_fd = os.open(template_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            block_size = os.fstat(template_fd).st_size
+            if block_size == 0:
+                raise ValueError(f"Template file {template_path} is empty")
+            for offset in range(0, size, block_size):
+                self._copy_block(template_fd, fd, offset, min(block_size, size - offset))
+        finally:
+            os.close(template_fd)
+            if self.template_path is None:
+                os.remove(template_path)
+
+    @staticmethod
+    def _copy_block(template_fd, fd, offset, count) -> None:
+        copied = 0
+        while copied < count:
+            done = copy_range(template_fd, fd, copied, offset + copied, count - copied)
+            if done == 0:
+                raise OSError(f"Copying the template stopped at {offset + copied} bytes")
+            copied += done
+
+    @staticmethod
+    def _place(fd, offset, data) -> None:
+        """Writes the secret through an mmap window of the pages around it."""
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        with mmap.mmap(fd, offset + len(data) - start, offset=start) as window:
+            window[offset - start:offset - start + len(data)] = data
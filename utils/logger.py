@@ -21,15 +21,32 @@ COLORS = {
 
 # Custom logging format
 class ColoredFormatter(logging.Formatter):
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        # One formatter per level with the color baked into the format, so records are never modified.
+        fmt = fmt or '%(message)s'
+        self._formatters = {
+            level: logging.Formatter(fmt.replace('%(message)s', f'{color}%(message)s{RESET}'), datefmt)
+            for level, color in COLORS.items()
+        }
+
     def format(self, record):
-        color = COLORS.get(record.levelname, RESET)
-        record.msg = f"{color}{record.msg}{RESET}"
-        return super().format(record)
+        formatter = self._formatters.get(record.levelname)
+        if formatter is None:
+            return super().format(record)
+        return formatter.format(record)
+
+# Handler added by setup_logger, so calling it again does not add a second one.
+_console_handler = None
 
-def setup_logger():
+def setup_logger(level=logging.DEBUG):
+    """Sends log records of the level and above to the console in color; safe to call more than once."""
+    global _console_handler
     # Configure logging
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)  # Set to DEBUG to include all levels
+    logger.setLevel(level)  # DEBUG by default, to include all levels
+    if _console_handler is not None and _console_handler in logger.handlers:
+        return logger
 
     # Create console handler
     console_handler = logging.StreamHandler()
@@ -38,5 +55,6 @@ def setup_logger():
 
     # Add the handler to the logger
     logger.addHandler(console_handler)
+    _console_handler = console_handler
 
     return logger
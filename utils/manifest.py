@@ -0,0 +1,307 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import NamedTuple, Optional
+
+MANIFEST_COLUMNS = ("path", "extension", "is_hidden", "recycle_bin", "secret_name", "offset", "length", "content_hash",
+                    "encoding")
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS manifest (
+    path TEXT NOT NULL,
+    extension TEXT,
+    is_hidden INTEGER NOT NULL,
+    recycle_bin INTEGER NOT NULL,
+    secret_name TEXT,
+    offset INTEGER,
+    length INTEGER,
+    content_hash TEXT,
+    encoding TEXT
+)
+"""
+CREATE_INDEXES_SQL = (
+    "CREATE INDEX IF NOT EXISTS manifest_path ON manifest (path)",
+    "CREATE INDEX IF NOT EXISTS manifest_secret ON manifest (secret_name)",
+)
+INSERT_SQL = f"INSERT INTO manifest VALUES ({', '.join('?' for _ in MANIFEST_COLUMNS)})"
+
+
+class ManifestEntry(NamedTuple):
+    """Ground truth for one secret in one generated file.
+
+    offset is -1 when the secret is not stored verbatim (e.g. inside a compressed document) and None when
+    the file was written without a known secret. encoding is the chain the secret was encoded with (see
+    utils.secret_encodings); offset and length then locate the encoded secret.
+    """
+    path: str
+    extension: str
+    is_hidden: bool
+    recycle_bin: bool
+    secret_name: Optional[str]
+    offset: Optional[int]
+    length: Optional[int]
+    content_hash: str
+    encoding: Optional[str] = None
+
+
+def upgrade_table(connection) -> None:
+    """Adds the columns introduced since a SQLite manifest was written, e.g. encoding."""
+    existing = {row[1] for row in connection.execute("PRAGMA table_info(manifest)")}
+    for column in MANIFEST_COLUMNS:
+        if existing and column not in existing:
+            connection.execute(f"ALTER TABLE manifest ADD COLUMN {column} TEXT")
+
+
+def content_hash(data) -> str:
+    """Compact hash of a file's content."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def normalize_path(path) -> str:
+    """Normalizes a path the way the manifest stores it, so scanner findings can be joined against it."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def build_entry(full_path, data, secret=None, is_hidden=False, recycle_bin=False, encoding=None,
+                encoded_secret=None) -> ManifestEntry:
+    """Builds the manifest entry of a file from its content and the secret it carries.
+
+    For encoded secrets, encoded_secret holds the bytes the encoded secret appears as, or None when the encoding
+    hides it (e.g. compression of the whole body).
+    """
+    secret_name = offset = length = None
+    if secret is not None:
+        secret_name = secret["name"]
+        secret_bytes = encoded_secret if encoded_secret is not None else secret["example"].encode("utf-8")
+        if encoding is not None and encoded_secret is None:
+            offset = -1
+        else:
+            offset = bytes(data).find(secret_bytes) if isinstance(data, memoryview) else data.find(secret_bytes)
+        length = len(secret_bytes)
+    return ManifestEntry(normalize_path(full_path), os.path.splitext(full_path)[1], is_hidden, recycle_bin,
+                         secret_name, offset, length, content_hash(data), encoding)
+
+
+class RunManifest:
+    """Records the ground truth of every generated file.
+
+    A manifest describes one run, so an existing file is replaced. With keep_existing (incremental runs) the
+    entries of files the run skips are kept instead, and a file written again replaces its old entries.
+    """
+
+    def __init__(self, file_path, keep_existing=False):
+        self.file_path = file_path
+        self.keep_existing = keep_existing
+        self._lock = threading.Lock()
+        # Paths recorded by this run, whose earlier entries are dropped; only tracked with keep_existing.
+        self._recorded_paths = set()
+
+    def record(self, entry) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Makes sure every recorded entry is stored."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonlManifest(RunManifest):
+    """Streams the manifest as one compact JSON array per line, in MANIFEST_COLUMNS order."""
+
+    def __init__(self, file_path, keep_existing=False):
+        super().__init__(file_path, keep_existing)
+        self._previous_path = None
+        mode = "w"
+        if keep_existing:
+            # This run's entries go to a fresh file; the earlier entries of paths it does not write again are
+            # appended from the previous file on close.
+            self._previous_path = file_path + ".previous"
+            if os.path.isfile(self._previous_path):
+                # An interrupted run left the previous entries behind; its own entries are newer, so they stay.
+                if os.path.isfile(file_path):
+                    self._recorded_paths.update(entry.path for entry in iter_manifest(file_path))
+                    mode = "a"
+            elif os.path.isfile(file_path):
+                os.replace(file_path, self._previous_path)
+            else:
+                self._previous_path = None
+        self._file = open(file_path, mode, encoding="utf-8", buffering=1 << 16)
+
+    def record(self, entry) -> None:
+        line = json.dumps(list(entry), ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            if self._previous_path is not None:
+                self._recorded_paths.add(entry[0])
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._previous_path is not None:
+                with open(self._previous_path, encoding="utf-8") as previous_file:
+                    for line in previous_file:
+                        if line.strip() and json.loads(line)[0] not in self._recorded_paths:
+                            self._file.write(line)
+                os.remove(self._previous_path)
+                self._previous_path = None
+            self._file.close()
+
+
+class SqliteManifest(RunManifest):
+    """Stores the manifest in an indexed SQLite table, inserting in batches."""
+
+    def __init__(self, file_path, batch_size=10000, keep_existing=False):
+        super().__init__(file_path, keep_existing)
+        self.batch_size = batch_size
+        self._pending = []
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.execute(CREATE_TABLE_SQL)
+        upgrade_table(self._connection)
+        if not keep_existing:
+            self._connection.execute("DELETE FROM manifest")
+            self._connection.commit()
+
+    def record(self, entry) -> None:
+        with self._lock:
+            self._pending.append(entry)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            # Indexes are built once at the end, which is much faster than maintaining them per insert.
+            for statement in CREATE_INDEXES_SQL:
+                self._connection.execute(statement)
+            self._connection.commit()
+            self._connection.close()
+
+    def _flush(self) -> None:
+        if self._pending:
+            if self.keep_existing:
+                # A file written again replaces the entries of its earlier run, once per path.
+                new_paths = {entry[0] for entry in self._pending} - self._recorded_paths
+                self._connection.executemany("DELETE FROM manifest WHERE path = ?", ((path,) for path in new_paths))
+                self._recorded_paths.update(new_paths)
+            self._connection.executemany(INSERT_SQL, self._pending)
+            self._connection.commit()
+            self._pending = []
+
+
+def create_manifest(file_path, keep_existing=False) -> RunManifest:
+    """Creates a manifest, stored in SQLite for .db/.sqlite paths and as JSONL otherwise.
+
+    keep_existing keeps the entries of an existing manifest for the files the run does not write again.
+    """
+    if os.path.splitext(file_path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        return SqliteManifest(file_path, keep_existing=keep_existing)
+    return JsonlManifest(file_path, keep_existing=keep_existing)
+
+
+def iter_manifest(file_path):
+    """Yields the entries of a JSONL or SQLite manifest."""
+    if os.path.splitext(file_path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+        connection = sqlite3.connect(file_path)
+        try:
+            upgrade_table(connection)
+            for row in connection.execute(f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM manifest"):
+                yield ManifestEntry(*row)
+        finally:
+            connection.close()
+        return
+    with open(file_path, encoding="utf-8") as manifest_file:
+        for line in manifest_file:
+            if line.strip():
+                yield ManifestEntry(*json.loads(line))
+
+
+def merge_manifests(part_paths, output_path, keep_existing=False) -> int:
+    """Merges partial manifests (e.g. one per worker process) into one and returns the number of entries merged.
+
+    keep_existing keeps the entries of output_path for the files no part has entries for (incremental runs).
+    """
+    count = 0
+    with create_manifest(output_path, keep_existing=keep_existing) as manifest:
+        for part_path in part_paths:
+            for entry in iter_manifest(part_path):
+                manifest.record(entry)
+                count += 1
+    return count
+
+
+class ManifestIndex:
+    """Indexed lookups over a manifest, for joining scanner findings against the ground truth."""
+
+    def __init__(self, file_path):
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"Manifest {file_path} does not exist")
+        if os.path.splitext(file_path)[1].lower() in (".db", ".sqlite", ".sqlite3"):
+            self._connection = sqlite3.connect(file_path)
+            upgrade_table(self._connection)
+        else:
+            # JSONL manifests are loaded into an in-memory SQLite table once.
+            self._connection = sqlite3.connect(":memory:")
+            self._connection.execute(CREATE_TABLE_SQL)
+            self._connection.executemany(INSERT_SQL, iter_manifest(file_path))
+        for statement in CREATE_INDEXES_SQL:
+            self._connection.execute(statement)
+
+    def by_path(self, path):
+        """Returns the entries of a generated file."""
+        return self._query("WHERE path = ?", (normalize_path(path),))
+
+    def by_secret(self, secret_name):
+        """Returns the entries of every file carrying the secret."""
+        return self._query("WHERE secret_name = ?", (secret_name,))
+
+    def match_findings(self, findings):
+        """Joins (path, secret_name) scanner findings against the manifest.
+
+        Yields (path, secret_name, entry) where entry is None for findings that are not in the ground truth.
+        """
+        self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS findings (position INTEGER, path TEXT, secret_name TEXT)")
+        self._connection.execute("DELETE FROM findings")
+        self._connection.executemany("INSERT INTO findings VALUES (?, ?, ?)",
+                                     ((position, normalize_path(path), secret_name)
+                                      for position, (path, secret_name) in enumerate(findings)))
+        columns = ", ".join(f"manifest.{column}" for column in MANIFEST_COLUMNS)
+        rows = self._connection.execute(
+            f"SELECT findings.path, findings.secret_name, {columns} FROM findings "
+            "LEFT JOIN manifest ON manifest.path = findings.path "
+            "AND (findings.secret_name IS NULL OR manifest.secret_name = findings.secret_name) "
+            "ORDER BY findings.position")
+        for row in rows:
+            yield row[0], row[1], ManifestEntry(*row[2:]) if row[2] is not None else None
+
+    def missed(self, findings):
+        """Returns the manifest entries no finding points at (false negatives of the scanner)."""
+        list(self.match_findings(findings))
+        columns = ", ".join(f"manifest.{column}" for column in MANIFEST_COLUMNS)
+        rows = self._connection.execute(
+            f"SELECT {columns} FROM manifest WHERE secret_name IS NOT NULL AND NOT EXISTS "
+            "(SELECT 1 FROM findings WHERE findings.path = manifest.path "
+            "AND (findings.secret_name IS NULL OR findings.secret_name = manifest.secret_name))")
+        return [ManifestEntry(*row) for row in rows]
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _query(self, where, parameters):
+        rows = self._connection.execute(f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM manifest {where}", parameters)
+        return [ManifestEntry(*row) for row in rows]
@@ -0,0 +1,194 @@
+import errno
+import functools
+import os
+import stat
+import sys
+import time
+from urllib.parse import quote
+
+# Windows file attribute marking a file or folder as hidden.
+FILE_ATTRIBUTE_HIDDEN = 0x02
+INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+
+
+def dotfile_path(path) -> str:
+    """Returns the path with a '.' in front of its last component, keeping any trailing separator."""
+    stripped = path.rstrip("\\/") or path
+    head, tail = os.path.split(stripped)
+    if not tail or tail.startswith("."):
+        return path
+    return os.path.join(head, "." + tail) + path[len(stripped):]
+
+
+class PlatformBackend:
+    """Native hidden-file and trash operations of one operating system.
+
+    hide and trash take many paths at once, so callers can batch thousands of files into a single call.
+    """
+
+    name = "base"
+
+    def hidden_path(self, path) -> str:
+        """Returns the path a hidden file or folder is created at."""
+        return path
+
+    def hide(self, paths) -> None:
+        """Marks existing files or folders as hidden."""
+        raise NotImplementedError
+
+    def trash(self, paths) -> None:
+        """Moves existing files to the trash (recycle bin)."""
+        raise NotImplementedError
+
+
+class WindowsPlatform(PlatformBackend):
+    """Hidden attribute through the Win32 API, recycle bin through send2trash."""
+
+    name = "windows"
+
+    def hide(self, paths) -> None:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        for path in paths:
+            attributes = kernel32.GetFileAttributesW(str(path))
+            if attributes == INVALID_FILE_ATTRIBUTES:
+                raise FileNotFoundError(errno.ENOENT, "Cannot hide a missing file", str(path))
+            if not kernel32.SetFileAttributesW(str(path), attributes | FILE_ATTRIBUTE_HIDDEN):
+                raise ctypes.WinError()
+
+    def trash(self, paths) -> None:
+        from send2trash.win.modern import send2trash
+
+        paths = [str(path) for path in paths]
+        if paths:
+            # One shell file operation for the whole batch.
+            send2trash(paths)
+
+
+class MacPlatform(PlatformBackend):
+    """Dotfiles that also carry the UF_HIDDEN flag, trash through send2trash."""
+
+    name = "mac"
+
+    def hidden_path(self, path) -> str:
+        return dotfile_path(path)
+
+    def hide(self, paths) -> None:
+        for path in paths:
+            os.chflags(path, os.lstat(path).st_flags | stat.UF_HIDDEN)
+
+    def trash(self, paths) -> None:
+        from send2trash.mac.modern import send2trash
+
+        paths = [str(path) for path in paths]
+        if paths:
+            send2trash(paths)
+
+
+class FreedesktopPlatform(PlatformBackend):
+    """Linux and other XDG desktops: dotfiles are hidden by name, and the trash follows the freedesktop.org
+    Trash specification, with a .trashinfo file per trashed file and a plain rename into the trash.
+    """
+
+    name = "freedesktop"
+
+    def __init__(self, home_trash=None):
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        self.home_trash = home_trash or os.path.join(data_home, "Trash")
+
+    def hidden_path(self, path) -> str:
+        return dotfile_path(path)
+
+    def hide(self, paths) -> None:
+        # The leading dot given by hidden_path is all there is to hiding a file here.
+        pass
+
+    def trash(self, paths) -> None:
+        deletion_date = time.strftime("%Y-%m-%dT%H:%M:%S")
+        # Device -> (trash folder, top folder of the device or None for the home trash), resolved once per batch.
+        trash_folders = {}
+        # (trash folder, name) -> last number used for that name, so repeated names are not probed from 1.
+        counters = {}
+        for path in paths:
+            path = os.path.abspath(os.fspath(path))
+            device = os.lstat(path).st_dev
+            if device not in trash_folders:
+                trash_folders[device] = self._trash_folder(path, device)
+            trash_folder, top_folder = trash_folders[device]
+            self._trash_one(path, trash_folder, top_folder, deletion_date, counters)
+
+    def _trash_folder(self, path, device):
+        """Returns the trash folder for files on the device, with the device's top folder unless it is the home trash."""
+        self._makedirs(self.home_trash)
+        if os.stat(self.home_trash).st_dev == device:
+            return self.home_trash, None
+        top_folder = self._mount_point(path)
+        uid = os.getuid()
+        shared = os.path.join(top_folder, ".Trash")
+        # $topdir/.Trash is only used when the administrator set it up as a sticky, non-symlinked folder.
+        if os.path.isdir(shared) and not os.path.islink(shared) and os.stat(shared).st_mode & stat.S_ISVTX:
+            trash_folder = os.path.join(shared, str(uid))
+        else:
+            trash_folder = os.path.join(top_folder, f".Trash-{uid}")
+        self._makedirs(trash_folder)
+        return trash_folder, top_folder
+
+    @staticmethod
+    def _makedirs(trash_folder) -> None:
+        for folder in (os.path.join(trash_folder, "files"), os.path.join(trash_folder, "info")):
+            os.makedirs(folder, mode=0o700, exist_ok=True)
+
+    @staticmethod
+    def _mount_point(path) -> str:
+        path = os.path.dirname(path)
+        device = os.stat(path).st_dev
+        while True:
+            parent = os.path.dirname(path)
+            if parent == path or os.stat(parent).st_dev != device:
+                return path
+            path = parent
+
+    @staticmethod
+    def _trash_one(path, trash_folder, top_folder, deletion_date, counters) -> None:
+        # Paths in a device's own trash are stored relative to its top folder, as the specification suggests.
+        stored_path = path if top_folder is None else os.path.relpath(path, top_folder)
+        info = f"[Trash Info]\nPath={quote(os.fsencode(stored_path), safe='/')}\nDeletionDate={deletion_date}\n"
+        base_name = os.path.basename(path)
+        key = (trash_folder, base_name)
+        number = counters.get(key, 0)
+        while True:
+            # Creating the .trashinfo file exclusively is what reserves the name in the trash.
+            name = base_name if number == 0 else f"{base_name}.{number}"
+            info_path = os.path.join(trash_folder, "info", name + ".trashinfo")
+            try:
+                fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                break
+            except FileExistsError:
+                number += 1
+        counters[key] = number + 1
+        try:
+            os.write(fd, info.encode("utf-8"))
+        finally:
+            os.close(fd)
+        try:
+            os.rename(path, os.path.join(trash_folder, "files", name))
+        except OSError:
+            os.remove(info_path)
+            raise
+
+
+def create_platform_backend(name=None) -> PlatformBackend:
+    """Creates the backend by name, or the one of the running operating system."""
+    backends = {"windows": WindowsPlatform, "mac": MacPlatform, "freedesktop": FreedesktopPlatform}
+    if name is None:
+        name = {"win32": "windows", "darwin": "mac"}.get(sys.platform, "freedesktop")
+    if name not in backends:
+        raise ValueError(f"Unknown platform backend '{name}', expected one of {sorted(backends)}")
+    return backends[name]()
+
+
+@functools.lru_cache(maxsize=None)
+def default_platform_backend() -> PlatformBackend:
+    """The backend of the running operating system, shared by every Tools instance."""
+    return create_platform_backend()
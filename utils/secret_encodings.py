@@ -0,0 +1,141 @@
+"""Composable encodings of secrets, for files where a scanner has to decode the secret before it can find it.
+
+A chain is written as steps joined by "|" and applied left to right, e.g. "base64", "gzip|base64" or
+"base64|wrap:76". Steps before an "embed" step transform the secret, which is then rendered into the file like
+a plain secret; steps after it transform the whole file body, e.g. "embed|utf16le" or "embed|gzip". Without
+"embed" the whole chain applies to the secret.
+"""
+import base64
+import binascii
+import codecs
+import functools
+import gzip
+import zlib
+from urllib.parse import quote
+
+# Step separating the secret steps of a chain from the body steps.
+EMBED = "embed"
+
+
+def _text(data, step) -> str:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        raise ValueError(f"Step '{step}' needs text, but the steps before it produced binary data") from None
+
+
+def _url_all(data, argument) -> bytes:
+    # Every byte percent-encoded, including letters and digits.
+    return "".join(f"%{byte:02X}" for byte in data).encode("ascii")
+
+
+def _utf16(step, encoding, bom):
+    def encode(data, argument) -> bytes:
+        return bom + _text(data, step).encode(encoding)
+    return encode
+
+
+def _wrap(data, width) -> bytes:
+    text = _text(data, "wrap")
+    return "\n".join(text[start:start + width] for start in range(0, len(text), width)).encode("utf-8")
+
+
+def _split(data, width) -> bytes:
+    # String literals concatenated across lines, the way secrets are split up in source code.
+    text = _text(data, "split")
+    pieces = [text[start:start + width] for start in range(0, len(text), width)] or [""]
+    return ('"' + '" +\n"'.join(pieces) + '"').encode("utf-8")
+
+
+# Step name -> (function of the data and the step argument, whether the step takes a width).
+STEPS = {
+    "base64": (lambda data, argument: base64.b64encode(data), False),
+    "base64url": (lambda data, argument: base64.urlsafe_b64encode(data), False),
+    "hex": (lambda data, argument: binascii.hexlify(data), False),
+    "url": (lambda data, argument: quote(data, safe="").encode("ascii"), False),
+    "url_all": (_url_all, False),
+    "utf16le": (_utf16("utf16le", "utf-16-le", codecs.BOM_UTF16_LE), False),
+    "utf16be": (_utf16("utf16be", "utf-16-be", codecs.BOM_UTF16_BE), False),
+    # A fixed mtime keeps the output reproducible, so incremental runs and content hashes stay stable.
+    "gzip": (lambda data, argument: gzip.compress(data, mtime=0), False),
+    "zlib": (lambda data, argument: zlib.compress(data), False),
+    "wrap": (_wrap, True),
+    "split": (_split, True),
+}
+
+# Body steps that keep the secret recognizable, with the codec its bytes are found with afterwards.
+TRANSPARENT_BODY_STEPS = {"utf16le": "utf-16-le", "utf16be": "utf-16-be"}
+
+
+def _parse_step(step):
+    name, _, argument = step.strip().partition(":")
+    if name not in STEPS:
+        raise ValueError(f"Unknown encoding step '{name}', expected one of {sorted(STEPS) + [EMBED]}")
+    takes_width = STEPS[name][1]
+    if takes_width:
+        if not argument.isdigit() or int(argument) < 1:
+            raise ValueError(f"Encoding step '{name}' needs a positive width, e.g. '{name}:64'")
+        return name, int(argument)
+    if argument:
+        raise ValueError(f"Encoding step '{name}' takes no argument")
+    return name, None
+
+
+class EncodingChain:
+    """A parsed chain of encoding steps; use encoding_chain() to get a shared instance."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        steps = [step.strip() for step in spec.split("|")]
+        if steps.count(EMBED) > 1:
+            raise ValueError(f"Encoding chain '{spec}' embeds the secret more than once")
+        embed_at = steps.index(EMBED) if EMBED in steps else len(steps)
+        self.secret_steps = [_parse_step(step) for step in steps[:embed_at]]
+        self.body_steps = [_parse_step(step) for step in steps[embed_at + 1:]]
+        if not (self.secret_steps or self.body_steps):
+            raise ValueError(f"Encoding chain '{spec}' has no steps")
+        # The part of the chain applied to the secret alone, or None when every step encodes the body.
+        self.secret_spec = "|".join(steps[:embed_at]) or None
+        # Name of the chain usable in file names, e.g. "gzip-base64" or "base64-wrap76".
+        self.label = "-".join(step.replace(":", "") for step in steps)
+
+    def encode_secret_text(self, text) -> str:
+        """Applies the secret steps to the secret text."""
+        data = text.encode("utf-8")
+        for name, argument in self.secret_steps:
+            data = STEPS[name][0](data, argument)
+        return _text(data, EMBED)
+
+    def encode_secret(self, secret) -> dict:
+        """Returns the secret with its example replaced by the encoded text."""
+        if not self.secret_steps:
+            return secret
+        return {**secret, "example": self.encode_secret_text(secret["example"])}
+
+    def encode_body(self, body) -> bytes:
+        """Applies the body steps to a rendered file body."""
+        data = bytes(body)
+        for name, argument in self.body_steps:
+            data = STEPS[name][0](data, argument)
+        return data
+
+    def locate(self, secret, escape=None):
+        """Bytes of the encoded secret as they appear in the file, or None when a body step hides them.
+
+        escape turns the encoded text into the form the renderer stores it in, e.g. a JSON string body.
+        """
+        text = self.encode_secret_text(secret["example"])
+        if escape is not None:
+            text = escape(text)
+        codec = "utf-8"
+        for name, _ in self.body_steps:
+            if name not in TRANSPARENT_BODY_STEPS:
+                return None
+            codec = TRANSPARENT_BODY_STEPS[name]
+        return text.encode(codec)
+
+
+@functools.lru_cache(maxsize=256)
+def encoding_chain(spec) -> EncodingChain:
+    """Parses an encoding chain once; file specs only carry the chain string."""
+    return EncodingChain(spec)
@@ -0,0 +1,117 @@
+import base64
+import json
+import os
+import random
+import string
+
+# Pattern specs shipped with the project, one per secret type.
+DEFAULT_PATTERNS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config",
+                                     "secret_patterns.json")
+
+CHARSETS = {
+    "upper": string.ascii_uppercase,
+    "lower": string.ascii_lowercase,
+    "digits": string.digits,
+    "alnum": string.ascii_letters + string.digits,
+    "hex": "0123456789abcdef",
+    "base32": string.ascii_uppercase + "234567",
+    "base64": string.ascii_letters + string.digits + "+/",
+    "base64url": string.ascii_letters + string.digits + "-_",
+}
+
+JWT_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=").decode("ascii")
+
+
+def load_secret_patterns(file_path=DEFAULT_PATTERNS_PATH) -> dict:
+    """Loads the pattern spec of every secret type.
+
+    A pattern is a list of parts: literal strings, {"charset": name, "length": n} with an optional "wrap"
+    line width, or {"format": "jwt"}.
+    """
+    with open(file_path, encoding="utf-8") as patterns_file:
+        return json.load(patterns_file)
+
+
+class _Charset:
+    """Maps random bytes onto an alphabet without modulo bias, a whole batch at a time."""
+
+    def __init__(self, alphabet):
+        alphabet = alphabet.encode("ascii")
+        # Bytes at or above the limit would favour the start of the alphabet and are dropped.
+        limit = 256 - 256 % len(alphabet)
+        self._table = bytes(alphabet[value % len(alphabet)] for value in range(256))
+        self._rejected = bytes(range(limit, 256))
+        self._ratio = 256 / limit
+
+    def draw(self, rng, count) -> str:
+        chunks = []
+        remaining = count
+        while remaining > 0:
+            chunk = rng.randbytes(int(remaining * self._ratio) + 16).translate(self._table, self._rejected)[:remaining]
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks).decode("ascii")
+
+
+class SecretSynthesizer:
+    """Generates unlimited unique, valid-looking secrets from pattern specs with a seeded RNG.
+
+    Random characters for a whole batch are drawn with one randbytes call per pattern part and mapped onto
+    the charset with bytes.translate, so the per-secret work is a few string slices and a join. The same
+    seed always yields the same secrets.
+    """
+
+    def __init__(self, seed=0, patterns=None):
+        self.seed = seed
+        self.patterns = patterns if patterns is not None else load_secret_patterns()
+        self._rng = random.Random(seed)
+        self._charsets = {name: _Charset(alphabet) for name, alphabet in CHARSETS.items()}
+        self._counters = dict.fromkeys(self.patterns, 0)
+
+    @property
+    def secret_types(self):
+        return list(self.patterns)
+
+    def generate(self, secret_type, count):
+        """Returns a batch of secrets of one type, as {"name", "type", "example"} dictionaries."""
+        if secret_type not in self.patterns:
+            raise ValueError(f"Unknown secret type '{secret_type}', expected one of {sorted(self.patterns)}")
+        columns = [self._column(part, count) for part in self.patterns[secret_type]]
+        start = self._counters[secret_type]
+        self._counters[secret_type] = start + count
+        return [{"name": f"{secret_type}_{start + index:08d}", "type": secret_type, "example": "".join(parts)}
+                for index, parts in enumerate(zip(*columns))]
+
+    def iter_secrets(self, secret_types=None, batch_size=1024):
+        """Yields secrets endlessly, cycling through the types one batch at a time."""
+        secret_types = list(secret_types or self.patterns)
+        while True:
+            batches = [self.generate(secret_type, batch_size) for secret_type in secret_types]
+            for secrets in zip(*batches):
+                yield from secrets
+
+    def _column(self, part, count):
+        """Returns the values of one pattern part for every secret of a batch."""
+        if isinstance(part, str):
+            return [part] * count
+        if part.get("format") == "jwt":
+            return self._jwt_column(count)
+        if part.get("charset") not in self._charsets:
+            raise ValueError(f"Unknown charset in pattern part {part}, expected one of {sorted(CHARSETS)}")
+        length = part["length"]
+        drawn = self._charsets[part["charset"]].draw(self._rng, length * count)
+        values = [drawn[index:index + length] for index in range(0, length * count, length)]
+        wrap = part.get("wrap")
+        if wrap:
+            values = ["\n".join(value[offset:offset + wrap] for offset in range(0, length, wrap)) for value in values]
+        return values
+
+    def _jwt_column(self, count):
+        subjects = self._column({"charset": "digits", "length": 10}, count)
+        signatures = self._column({"charset": "base64url", "length": 43}, count)
+        issued = [1500000000 + self._rng.randrange(300000000) for _ in range(count)]
+        tokens = []
+        for subject, issued_at, signature in zip(subjects, issued, signatures):
+            payload = f'{{"sub":"{subject}","iat":{issued_at}}}'.encode("ascii")
+            tokens.append(f"{JWT_HEADER}.{base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')}.{signature}")
+        return tokens
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import mmap
+import os
+import random
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+
+# Catalogs at least this large get their index stored next to them; smaller ones are indexed in memory.
+INDEX_MIN_BYTES = 1 << 20
+
+# Matches a whole string (with escapes) or a single bracket; finditer skips the text in between in C.
+# Strings are matched only to step over the brackets inside them, so every token is matched at most once
+# and no run of text can backtrack.
+JSON_TOKEN_PATTERN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|([{}\[\]])', re.DOTALL)
+
+CREATE_INDEX_SQL = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS entries (position INTEGER PRIMARY KEY, offset INTEGER NOT NULL, "
+    "length INTEGER NOT NULL, name TEXT, type TEXT)",
+)
+CREATE_LOOKUP_INDEXES_SQL = (
+    "CREATE INDEX IF NOT EXISTS entries_name ON entries (name)",
+    "CREATE INDEX IF NOT EXISTS entries_type ON entries (type)",
+)
+
+_decode = json.JSONDecoder().decode
+
+
+def decode_entry(data) -> dict:
+    """Decodes one catalog entry from its UTF-8 bytes."""
+    return _decode(str(data, "utf-8"))
+
+
+def iter_jsonl_spans(buffer):
+    """Yields the (offset, length) of every non-empty line of a JSONL buffer."""
+    start = 0
+    size = len(buffer)
+    while start < size:
+        end = buffer.find(b"\n", start)
+        if end == -1:
+            end = size
+        if buffer[start:end].strip():
+            yield start, end - start
+        start = end + 1
+
+
+def iter_json_array_spans(buffer):
+    """Yields the (offset, length) of every object in a top-level JSON array without parsing the document."""
+    depth = 0
+    start = None
+    for match in JSON_TOKEN_PATTERN.finditer(buffer):
+        bracket = match.group(1)
+        if bracket is None:
+            continue
+        if bracket in (b"{", b"["):
+            depth += 1
+            if depth == 2 and bracket == b"{":
+                start = match.start(1)
+        else:
+            if depth == 2 and bracket == b"}":
+                yield start, match.end(1) - start
+            depth -= 1
+
+
+class SecretsStore(Sequence):
+    """Read-only, lazily decoded view of a secrets catalog in JSON (an array of objects) or JSONL.
+
+    The catalog is memory-mapped and indexed once: the byte span, name and type of every entry are stored
+    in a SQLite index next to large catalogs and rebuilt whenever the catalog changes. Entries are decoded
+    on access, with a bounded cache of recently used ones, so startup costs neither a full parse nor memory
+    proportional to the catalog.
+    """
+
+    def __init__(self, file_path, index_path=None, cache_size=4096):
+        self.file_path = file_path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = open(file_path, "rb")
+        stat = os.fstat(self._file.fileno())
+        # Empty files cannot be mapped.
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        source = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+        if index_path is None and stat.st_size >= INDEX_MIN_BYTES:
+            index_path = file_path + ".index.db"
+        self._index = sqlite3.connect(index_path or ":memory:", check_same_thread=False)
+        for statement in CREATE_INDEX_SQL:
+            self._index.execute(statement)
+        if self._meta("source") != source:
+            self._build_index(source)
+        self._length = int(self._meta("count"))
+        # Content hash of the catalog, so changes can be detected without decoding it (see utils.incremental).
+        self.fingerprint = self._meta("fingerprint")
+
+    def _meta(self, key):
+        with self._lock:
+            row = self._index.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _build_index(self, source) -> None:
+        buffer = self._buffer
+        is_jsonl = self.file_path.lower().endswith((".jsonl", ".ndjson"))
+        spans = iter_jsonl_spans(buffer) if is_jsonl else iter_json_array_spans(buffer)
+
+        def rows():
+            for position, (offset, length) in enumerate(spans):
+                entry = decode_entry(buffer[offset:offset + length])
+                yield position, offset, length, entry.get("name"), entry.get("type")
+
+        with self._index:
+            self._index.execute("DELETE FROM entries")
+            self._index.execute("DELETE FROM meta")
+            self._index.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", rows())
+            for statement in CREATE_LOOKUP_INDEXES_SQL:
+                self._index.execute(statement)
+            count = self._index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            fingerprint = hashlib.blake2b(buffer, digest_size=16).hexdigest()
+            self._index.executemany("INSERT INTO meta VALUES (?, ?)",
+                                    (("source", source), ("count", str(count)), ("fingerprint", fingerprint)))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._entry(index) for index in range(*position.indices(self._length))]
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("secret index out of range")
+        return self._entry(position)
+
+    def __iter__(self):
+        # Entries are read straight from the spans in catalog order, bypassing the cache.
+        with self._lock:
+            spans = self._index.execute("SELECT offset, length FROM entries ORDER BY position").fetchall()
+        for offset, length in spans:
+            yield decode_entry(self._buffer[offset:offset + length])
+
+    def get(self, name, default=None):
+        """Returns the first entry with the given name."""
+        with self._lock:
+            row = self._index.execute("SELECT position FROM entries WHERE name = ? ORDER BY position LIMIT 1",
+                                      (name,)).fetchone()
+        return default if row is None else self._entry(row[0])
+
+    def by_type(self, secret_type):
+        """Returns every entry of the given type."""
+        with self._lock:
+            rows = self._index.execute("SELECT position FROM entries WHERE type = ? ORDER BY position",
+                                       (secret_type,)).fetchall()
+        return [self._entry(position) for position, in rows]
+
+    def names(self):
+        with self._lock:
+            return [name for name, in self._index.execute("SELECT name FROM entries ORDER BY position").fetchall()]
+
+    def sample(self, count, seed=None):
+        """Returns a reproducible random subset of the entries, in catalog order."""
+        positions = sorted(random.Random(seed).sample(range(self._length), min(count, self._length)))
+        return [self._entry(position) for position in positions]
+
+    def close(self) -> None:
+        self._index.close()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _entry(self, position):
+        with self._lock:
+            entry = self._cache.get(position)
+            if entry is not None:
+                self._cache.move_to_end(position)
+                return entry
+            offset, length = self._index.execute("SELECT offset, length FROM entries WHERE position = ?",
+                                                 (position,)).fetchone()
+        entry = decode_entry(self._buffer[offset:offset + length])
+        with self._lock:
+            self._cache[position] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
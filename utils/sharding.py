@@ -0,0 +1,31 @@
+import zlib
+from typing import NamedTuple
+
+
+class Shard(NamedTuple):
+    """One of count disjoint slices of the corpus, owning every path that hashes to its index.
+
+    Ownership only depends on the output path, so independent workers or machines need no coordination,
+    and together the shards write exactly the files of a single run.
+    """
+    # Zero-based index of the shard.
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value):
+        """Parses "i/N" with a one-based i, e.g. "1/4" to "4/4" for four shards."""
+        try:
+            number, count = (int(part) for part in str(value).split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard '{value}', expected i/N such as 1/4") from None
+        if count < 1 or not 1 <= number <= count:
+            raise ValueError(f"Invalid shard '{value}', i must be between 1 and N")
+        return cls(number - 1, count)
+
+    def owns(self, key) -> bool:
+        """Whether the path (or scenario name) belongs to this shard."""
+        return zlib.crc32(key.encode("utf-8", "surrogatepass")) % self.count == self.index
+
+    def __str__(self):
+        return f"{self.index + 1}/{self.count}"
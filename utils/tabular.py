@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import random
+import string
+from typing import NamedTuple
+
+from utils.filesystem import resolve_filesystem
+
+TABULAR_FORMATS = ("csv", "json", "jsonl")
+
+# Approximate size of the batches of rows built and written at a time. Batches that fit in the CPU cache
+# keep the strided column copies fast.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Random characters beyond one batch, so every batch can start the pool at a different offset.
+POOL_SLACK = 4 << 20
+
+FILLER_ALPHABET = (string.ascii_letters + string.digits).encode("ascii")
+# Filler only has to look random, so the slight modulo bias of this table does not matter.
+FILLER_TABLE = bytes(FILLER_ALPHABET[value % len(FILLER_ALPHABET)] for value in range(256))
+
+# memoryview formats for copying cells several bytes at a time.
+ITEM_FORMATS = {8: "Q", 4: "I", 2: "H", 1: "B"}
+
+
+class TabularSecret(NamedTuple):
+    """A secret placed in one cell of a tabular file."""
+    row: int
+    column: int
+    secret: dict
+    # Cell bytes as stored: quoted for CSV when needed, escaped for JSON.
+    data: bytes
+    # Byte offset and length of the secret value in the file.
+    offset: int
+    length: int
+
+
+class TabularGenerator:
+    """Streams wide and long CSV, JSON or JSONL files with secrets in chosen cells.
+
+    Every row has the same layout of fixed-width cells, so a batch of rows is filled column-wise with a handful
+    of strided slice assignments (CSV: one copy from a random character pool, then the separators; JSON: the
+    row template repeated, then the cells a machine word at a time). No Python code runs per cell, which keeps
+    generation well ahead of the disk. Filler cells are slices of a seeded random pool and may repeat; only the
+    secrets are unique.
+    """
+
+    def __init__(self, file_format="csv", columns=16, cell_length=16, chunk_size=DEFAULT_CHUNK_SIZE, seed=0,
+                 column_names=None):
+        if file_format not in TABULAR_FORMATS:
+            raise ValueError(f"Unknown tabular format '{file_format}', expected one of {TABULAR_FORMATS}")
+        self.file_format = file_format
+        self.columns = columns
+        self.cell_length = cell_length
+        self.seed = seed
+        self.column_names = list(column_names) if column_names else [f"col_{index:04d}" for index in range(columns)]
+        if len(self.column_names) != columns:
+            raise ValueError(f"Expected {columns} column names, got {len(self.column_names)}")
+        self._rng = random.Random(seed)
+        if file_format == "csv":
+            self._build_csv_layout()
+        else:
+            self._build_json_layout()
+        self.batch_rows = max(1, chunk_size // self.row_width)
+        self._pool = None
+
+    def _build_csv_layout(self):
+        self.header = (",".join(self.column_names) + "\n").encode("utf-8")
+        self.footer = b""
+        self.row_width = self.columns * (self.cell_length + 1)
+        self.slot_offsets = [column * (self.cell_length + 1) for column in range(self.columns)]
+        self._unit = 1
+
+    def _build_json_layout(self):
+        # Cells are aligned to the widest word dividing their length; the padding is whitespace between tokens.
+        self._unit = next(size for size in ITEM_FORMATS if self.cell_length % size == 0)
+        row = bytearray()
+        self.slot_offsets = []
+        for column, name in enumerate(self.column_names):
+            row += (b"{" if column == 0 else b", ") + json.dumps(name).encode("utf-8") + b":"
+            row += b" " * (-(len(row) + 1) % self._unit) + b'"'
+            self.slot_offsets.append(len(row))
+            row += b"x" * self.cell_length + b'"'
+        ending = b"}\n" if self.file_format == "jsonl" else b"},\n"
+        row += b" " * (-(len(row) + len(ending)) % self._unit) + ending
+        self._row_template = bytes(row)
+        self.row_width = len(row)
+        self.header = b"" if self.file_format == "jsonl" else b"[\n"
+        self.footer = b"" if self.file_format == "jsonl" else b"]\n"
+
+    def rows_for_size(self, size) -> int:
+        """Number of filler rows making a file of about the given size."""
+        return max(1, (size - len(self.header) - len(self.footer)) // self.row_width)
+
+    def encode_cell(self, value) -> tuple:
+        """Returns the stored bytes of a secret cell, with the offset and length of the value inside them."""
+        if self.file_format == "csv":
+            data = value.encode("utf-8")
+            if any(character in value for character in ',"\r\n'):
+                data = b'"' + value.replace('"', '""').encode("utf-8") + b'"'
+                return data, 1, len(data) - 2
+            return data, 0, len(data)
+        data = json.dumps(value, ensure_ascii=False)[1:-1].encode("utf-8")
+        return data, 0, len(data)
+
+    def plan(self, rows, secrets, secret_every=10000, secret_columns=None, secret_rows=None):
+        """Places secrets in turn every secret_every rows (or at the given rows), each in a random chosen column."""
+        if secret_rows is None:
+            secret_rows = range(secret_every // 2, rows, secret_every) if secret_every else ()
+        secret_columns = list(range(self.columns)) if secret_columns is None else list(secret_columns)
+        for column in secret_columns:
+            if not 0 <= column < self.columns:
+                raise ValueError(f"Secret column {column} is outside the {self.columns} columns")
+        rng = random.Random(self.seed)
+        cells = sorted({(row, rng.choice(secret_columns)) for row in secret_rows})
+
+        planned = []
+        # Bytes every earlier secret added or removed compared to a filler cell.
+        shift = 0
+        for index, (row, column) in enumerate(cells):
+            if not 0 <= row < rows:
+                raise ValueError(f"Secret row {row} is outside the {rows} rows")
+            secret = secrets[index % len(secrets)]
+            data, value_start, length = self.encode_cell(secret["example"])
+            offset = len(self.header) + row * self.row_width + self.slot_offsets[column] + shift + value_start
+            planned.append(TabularSecret(row, column, secret, data, offset, length))
+            shift += len(data) - self.cell_length
+        return planned
+
+    def iter_chunks(self, rows, planned):
+        """Yields the file content one batch of rows at a time, with the planned secrets spliced in."""
+        yield self.header
+        next_secret = 0
+        for start in range(0, rows, self.batch_rows):
+            count = min(self.batch_rows, rows - start)
+            batch = self._fill(count)
+            if self.file_format == "json" and start + count == rows:
+                # The last object of the array takes no trailing comma.
+                batch[batch.rindex(b",")] = ord(" ")
+            first_secret = next_secret
+            while next_secret < len(planned) and planned[next_secret].row < start + count:
+                next_secret += 1
+            # Splice from the end so the positions of earlier cells stay valid.
+            for item in reversed(planned[first_secret:next_secret]):
+                position = (item.row - start) * self.row_width + self.slot_offsets[item.column]
+                batch[position:position + self.cell_length] = item.data
+            yield batch
+        yield self.footer
+
+    def _fill(self, count) -> bytearray:
+        size = count * self.row_width
+        pool = self._random_pool(size)
+        if self.file_format == "csv":
+            # Copy a random stretch of the pool, then overwrite every separator and line end.
+            start = self._rng.randrange(len(pool) - size + 1)
+            batch = bytearray(pool[start:start + size])
+            batch[self.cell_length::self.cell_length + 1] = b"," * (count * self.columns)
+            batch[self.row_width - 1::self.row_width] = b"\n" * count
+            return batch
+
+        batch = bytearray(self._row_template * count)
+        item_format = ITEM_FORMATS[self._unit]
+        cells = memoryview(batch).cast(item_format)
+        words = memoryview(pool).cast(item_format)
+        stride = self.row_width // self._unit
+        # One strided copy per word of every column fills that word in all rows of the batch.
+        for slot_offset in self.slot_offsets:
+            for word in range(slot_offset // self._unit, (slot_offset + self.cell_length) // self._unit):
+                start = self._rng.randrange(len(words) - count + 1)
+                cells[word::stride] = words[start:start + count]
+        return batch
+
+    def _random_pool(self, size) -> bytes:
+        if self._pool is None or len(self._pool) < size + POOL_SLACK:
+            length = size + POOL_SLACK
+            self._pool = self._rng.randbytes(length - length % 8).translate(FILLER_TABLE)
+        return self._pool
+
+    def write(self, full_path, rows, secrets, secret_every=10000, secret_columns=None, secret_rows=None,
+              filesystem=None):
+        """Streams the file to the filesystem (the disk by default), writes its sidecar manifest and returns the manifest."""
+        filesystem = resolve_filesystem(filesystem)
+        planned = self.plan(rows, secrets, secret_every, secret_columns, secret_rows)
+        content_hash = hashlib.blake2b(digest_size=16)
+
+        def hashed_chunks():
+            for chunk in self.iter_chunks(rows, planned):
+                content_hash.update(chunk)
+                yield chunk
+
+        size = filesystem.write_chunks(full_path, hashed_chunks())
+
+        manifest = {
+            "file": os.path.basename(full_path),
+            "format": self.file_format,
+            "rows": rows,
+            "columns": self.columns,
+            "size": size,
+            "content_hash": content_hash.hexdigest(),
+            "secrets": [{"name": item.secret["name"], "row": item.row, "column": self.column_names[item.column],
+                         "offset": item.offset, "length": item.length} for item in planned],
+        }
+        filesystem.write_file(full_path + ".manifest.json", json.dumps(manifest, indent=4).encode("utf-8"))
+        return manifest
@@ -0,0 +1,73 @@
+import os
+import random
+
+TOPOLOGY_SHAPES = ("balanced", "deep", "flat")
+FILE_DISTRIBUTIONS = ("uniform", "zipf")
+
+
+class TreeTopology:
+    """Shape of a generated directory tree, and how many files go into each of its folders.
+
+    balanced: every folder above depth has branching children (depth x fan-out).
+    deep: every level has branching children, but only the first of them goes deeper (a long, narrow comb).
+    flat: the root folder alone, so every file lands in one huge directory.
+
+    Files are spread uniformly, or by a Zipf distribution over the folders in a seeded random order, so a few
+    folders hold most of the files. Both the tree and the spread are deterministic for the same parameters.
+    """
+
+    def __init__(self, shape="balanced", depth=3, branching=10, distribution="uniform", zipf_exponent=1.0, seed=0):
+        if shape not in TOPOLOGY_SHAPES:
+            raise ValueError(f"Unknown topology shape '{shape}', expected one of {TOPOLOGY_SHAPES}")
+        if distribution not in FILE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown file distribution '{distribution}', expected one of {FILE_DISTRIBUTIONS}")
+        if depth < 0 or branching < 1:
+            raise ValueError("Topology depth must be at least 0 and branching at least 1")
+        self.shape = shape
+        self.depth = 0 if shape == "flat" else depth
+        self.branching = branching
+        self.distribution = distribution
+        self.zipf_exponent = zipf_exponent
+        self.seed = seed
+        # Folder names are zero-padded, so a listing sorts in creation order.
+        self._name_width = len(str(branching - 1))
+
+    def relative_folders(self):
+        """Returns the folders as tuples of names, the root () first and every parent before its children."""
+        folders = [()]
+        level = [()]
+        for _ in range(self.depth):
+            # Only the first folder of a level has children in the deep shape.
+            parents = level[:1] if self.shape == "deep" else level
+            level = [parent + (f"d{child:0{self._name_width}d}",) for parent in parents for child in range(self.branching)]
+            folders.extend(level)
+        return folders
+
+    def folder_paths(self, root) -> list:
+        """Returns the folder paths under root in creation order, each ending with a separator."""
+        return [os.path.join(root, *names, "") for names in self.relative_folders()]
+
+    def file_counts(self, total_files) -> list:
+        """Returns how many of the files go into each folder, in the order of relative_folders()."""
+        folder_count = len(self.relative_folders())
+        if self.distribution == "uniform":
+            weights = [1.0] * folder_count
+        else:
+            # Folders get the Zipf ranks in a seeded random order, so the big ones are scattered over the tree.
+            ranks = list(range(1, folder_count + 1))
+            random.Random(self.seed).shuffle(ranks)
+            weights = [1.0 / rank ** self.zipf_exponent for rank in ranks]
+        total_weight = sum(weights)
+        shares = [total_files * weight / total_weight for weight in weights]
+        counts = [int(share) for share in shares]
+        # Largest remainders get the files lost to rounding down, ties going to the earlier folder.
+        by_remainder = sorted(range(folder_count), key=lambda index: (counts[index] - shares[index], index))
+        for index in by_remainder[:total_files - sum(counts)]:
+            counts[index] += 1
+        return counts
+
+    def iter_file_folders(self, root, total_files):
+        """Yields the folder path of every file in turn, filling the folders in creation order."""
+        for folder_path, count in zip(self.folder_paths(root), self.file_counts(total_files)):
+            for _ in range(count):
+                yield folder_path
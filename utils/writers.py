@@ -0,0 +1,174 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from utils.dedup import ContentStore
+from utils.filesystem import resolve_filesystem
+from utils.instrumentation import instrumentation
+
+
+class BaseWriter:
+    """Backend that Tools writes the contents of generated files through."""
+
+    # Name the writer is created by and reported under in the instrumentation.
+    name = "base"
+    # False for writers that put files somewhere else than on their filesystem, e.g. into an archive.
+    writes_to_filesystem = True
+    # Optional ContentStore linking files with the same body instead of writing them again (see utils.dedup).
+    content_store = None
+
+    def __init__(self, filesystem=None, dedup=None, max_links=None):
+        # Filesystem the files end up on (see utils.filesystem); the real disk by default.
+        self.filesystem = resolve_filesystem(filesystem)
+        if dedup:
+            self.content_store = ContentStore(mode=dedup, max_links=max_links)
+        # Folders known to exist, so each one is checked or created only once per run.
+        self._known_folders = set()
+
+    def ensure_folder(self, folder_path) -> None:
+        """Creates the folder if it was not seen before."""
+        if not folder_path or folder_path in self._known_folders:
+            return
+        self.filesystem.makedirs(folder_path)
+        self._remember_folder(folder_path)
+
+    def precreate_folders(self, folder_paths) -> None:
+        """Creates a whole directory tree in one pass, shallow folders first."""
+        for folder_path in sorted(set(folder_paths), key=len):
+            self.ensure_folder(folder_path)
+
+    def create_tree(self, folder_paths) -> None:
+        """Creates a planned folder tree, listed parents first, in one pass (see FileSystemTarget.mkdir_tree)."""
+        folder_paths = list(folder_paths)
+        self.filesystem.mkdir_tree(folder_paths)
+        if folder_paths:
+            self._remember_folder(folder_paths[0])
+        self._known_folders.update(folder_paths)
+
+    def _remember_folder(self, folder_path) -> None:
+        # A created folder implies all of its parents exist as well.
+        while folder_path and folder_path not in self._known_folders:
+            self._known_folders.add(folder_path)
+            parent = os.path.dirname(folder_path.rstrip("\\/"))
+            folder_path = parent if parent != folder_path else None
+
+    def write(self, full_path, data) -> None:
+        """Writes the bytes to the given path; the file may only appear on disk after flush()."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Makes sure every file passed to write() is on disk."""
+
+    def close(self) -> None:
+        """Flushes pending files and releases the writer's resources."""
+        self.flush()
+        if self.content_store is not None:
+            self.content_store.log_summary()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_file(self, full_path, data) -> None:
+        self.filesystem.write_file(full_path, data)
+
+
+class DirectWriter(BaseWriter):
+    """Writes every file immediately."""
+
+    name = "direct"
+
+    def write(self, full_path, data) -> None:
+        self._write_file(full_path, data)
+
+
+class BatchedWriter(BaseWriter):
+    """Collects files into batches and writes them together, optionally on a bounded background I/O thread."""
+
+    name = "batched"
+
+    def __init__(self, batch_size=256, background=False, max_pending_batches=8, filesystem=None, dedup=None, max_links=None):
+        super().__init__(filesystem, dedup=dedup, max_links=max_links)
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._error = None
+        self._queue = None
+        self._thread = None
+        if background:
+            # A bounded queue makes producers wait when the I/O thread falls behind.
+            self._queue = queue.Queue(maxsize=max_pending_batches)
+            self._thread = threading.Thread(target=self._io_loop, name="batched-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, full_path, data) -> None:
+        with self._lock:
+            self._pending.append((full_path, data))
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._submit(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._submit(batch)
+        if self._queue is not None:
+            self._queue.join()
+        self._raise_pending_error()
+
+    def close(self) -> None:
+        super().close()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _submit(self, batch) -> None:
+        if self._queue is None:
+            self._write_batch(batch)
+        else:
+            self._raise_pending_error()
+            self._queue.put(batch)
+
+    def _write_batch(self, batch) -> None:
+        start = time.perf_counter() if instrumentation.enabled else None
+        for full_path, data in batch:
+            self._write_file(full_path, data)
+        if start is not None:
+            instrumentation.observe("batch_seconds", time.perf_counter() - start, writer=self.name)
+        logging.debug(f"Wrote a batch of {len(batch)} files")
+
+    def _io_loop(self) -> None:
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                self._write_batch(batch)
+            except Exception as e:
+                # Keep draining the queue; the error is raised to the producer on its next call.
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_pending_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+
+def create_writer(name="direct", **kwargs) -> BaseWriter:
+    """Creates a writer backend by name."""
+    if name == "archive":
+        from utils.archive_writer import ArchiveWriter  # Imported here since it builds on this module.
+        return ArchiveWriter(**kwargs)
+    writers = {"direct": DirectWriter, "batched": BatchedWriter}
+    if name not in writers:
+        raise ValueError(f"Unknown writer '{name}', expected one of {sorted(writers) + ['archive']}")
+    return writers[name](**kwargs)